@@ -0,0 +1,40 @@
+# Times fetching both Airtable tables one after the other versus concurrently, against the local fake Airtable with a
+# simulated network round trip. Run from the repository root:
+#
+# 	python -m benchmarks.bench_fetch --latency 0.2 --records 1000
+import argparse
+import time
+
+from rations.fake_airtable import FakeAirtable
+from rations.sources import TABLE_NAMES, fetch_records, fetch_tables
+
+
+def fake_tables(records_per_table):
+	return {
+		table_name: [{"id": f"rec{index:06d}", "createdTime": "2020-11-01T00:00:00.000Z", "fields": {"Date": "1940-03-13"}} for index in range(records_per_table)]
+		for table_name in TABLE_NAMES
+	}
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark serial vs concurrent table fetches against a local fake Airtable.")
+	parser.add_argument("--latency", type=float, default=0.2, help="seconds added to every page request")
+	parser.add_argument("--records", type=int, default=1000, help="records per table")
+	arguments = parser.parse_args()
+
+	with FakeAirtable(fake_tables(arguments.records), latency=arguments.latency) as airtable:
+		start = time.perf_counter()
+		for table_name in TABLE_NAMES:
+			fetch_records(table_name, api_url=airtable.api_url)
+		serial = time.perf_counter() - start
+
+		start = time.perf_counter()
+		fetch_tables(TABLE_NAMES, api_url=airtable.api_url)
+		concurrent = time.perf_counter() - start
+
+	print(f"serial:     {serial:.3f}s")
+	print(f"concurrent: {concurrent:.3f}s ({serial / concurrent:.1f}x)")
+
+
+if __name__ == "__main__":
+	main()
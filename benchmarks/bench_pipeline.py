@@ -0,0 +1,138 @@
+# Times each stage of the rations pipeline, and its peak memory, on synthetic datasets of growing size. Run from the
+# repository root:
+#
+# 	python -m benchmarks.bench_pipeline                       # print timings
+# 	python -m benchmarks.bench_pipeline --compare             # ...and fail if a stage got slower or bigger
+# 	python -m benchmarks.bench_pipeline --save                # record the current timings as the baselines
+#
+# Baselines are kept in benchmarks/baselines.json. They depend on the machine, so record fresh ones before comparing
+# on a different one.
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.synthetic import GAPS_DAYS, GAPS_DURATIONS, generate_announcements, generate_caloric_values
+from rations.pipeline import (
+	calculate_announced_amount_per_item_per_day,
+	calculate_available_calories_per_item_per_day,
+	calculate_available_rations_runs_per_item,
+	calculate_available_rations_per_item_per_day,
+	calculate_total_amount_available_over_time,
+	calculate_total_available_over_time_with_clairvoyance,
+	format_caloric_values_from_airtable,
+	format_rations_data_from_airtable,
+)
+from rations.precompute import LOOKAHEAD_WINDOWS
+
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+
+# (records scale, item count, with gaps) triples; see benchmarks/synthetic.py. The larger datasets have food on nearly
+# every day, so each scale also comes with gaps, for the clairvoyant strategy to have days to fill.
+DATASETS = (
+	(1, 60, False),
+	(10, 60, False),
+	(100, 60, False),
+	(10, 600, False),
+	(1, 60, True),
+	(10, 60, True),
+	(100, 60, True),
+)
+
+# Stages faster or smaller than this are too noisy to compare against their baselines.
+MIN_COMPARED_SECONDS = 0.001
+MIN_COMPARED_BYTES = 64 * 1024
+
+
+def pipeline_stages(records, caloric_values):
+	# Yields (stage name, function) pairs, each stage feeding on the results of the ones before it.
+	state = {}
+
+	def run(name, function):
+		return name, lambda: state.__setitem__(name, function())
+
+	yield run("format_rations_data_from_airtable", lambda: format_rations_data_from_airtable(records))
+	yield run("format_caloric_values_from_airtable", lambda: format_caloric_values_from_airtable(caloric_values))
+	yield run("calculate_announced_amount_per_item_per_day", lambda: calculate_announced_amount_per_item_per_day(*state["format_rations_data_from_airtable"]))
+	yield run("calculate_available_rations_per_item_per_day", lambda: calculate_available_rations_per_item_per_day(*state["format_rations_data_from_airtable"]))
+	yield run("calculate_available_rations_runs_per_item", lambda: calculate_available_rations_runs_per_item(*state["format_rations_data_from_airtable"]))
+	yield run("calculate_available_calories_per_item_per_day", lambda: calculate_available_calories_per_item_per_day(state["calculate_available_rations_per_item_per_day"], state["format_caloric_values_from_airtable"][0]))
+	yield run("calculate_total_amount_available_over_time", lambda: calculate_total_amount_available_over_time(state["calculate_available_rations_per_item_per_day"]))
+	yield run("food_group_breakdown", lambda: state["calculate_available_calories_per_item_per_day"].group_by(state["format_caloric_values_from_airtable"][1]))
+	for window in LOOKAHEAD_WINDOWS:
+		yield run(f"calculate_total_available_over_time_with_clairvoyance[{window}]", lambda window=window: calculate_total_available_over_time_with_clairvoyance(state["calculate_total_amount_available_over_time"], window))
+
+
+def benchmark(scale, items, gaps, repeat):
+	if gaps:
+		records = generate_announcements(scale, items, days=GAPS_DAYS, durations=GAPS_DURATIONS)
+	else:
+		records = generate_announcements(scale, items)
+	caloric_values = generate_caloric_values(items)
+	timings = {}
+	peaks = {}
+	for _ in range(repeat):
+		for name, stage in pipeline_stages(records, caloric_values):
+			tracemalloc.start()
+			start = time.perf_counter()
+			stage()
+			elapsed = time.perf_counter() - start
+			peak = tracemalloc.get_traced_memory()[1]
+			tracemalloc.stop()
+			timings.setdefault(name, []).append(elapsed)
+			peaks[name] = max(peaks.get(name, 0), peak)
+	return {name: {"seconds": statistics.median(times), "peak_bytes": peaks[name]} for name, times in timings.items()}
+
+
+def dataset_key(scale, items, gaps=False):
+	return f"x{scale} records, {items} items{', with gaps' if gaps else ''}"
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Benchmark the rations pipeline on synthetic data.")
+	parser.add_argument("--repeat", type=int, default=5, help="runs per dataset; the median time is reported")
+	parser.add_argument("--save", action="store_true", help=f"record the results as the new baselines in {BASELINES_PATH}")
+	parser.add_argument("--compare", action="store_true", help="exit with an error if a stage is slower or bigger than its baseline")
+	parser.add_argument("--tolerance", type=float, default=1.5, help="how many times slower or bigger than the baseline counts as a regression")
+	arguments = parser.parse_args()
+
+	baselines = {}
+	if os.path.exists(BASELINES_PATH):
+		with open(BASELINES_PATH) as file:
+			baselines = json.load(file)
+
+	results = {}
+	regressions = []
+	for scale, items, gaps in DATASETS:
+		key = dataset_key(scale, items, gaps)
+		results[key] = benchmark(scale, items, gaps, arguments.repeat)
+		print(key)
+		for name, result in results[key].items():
+			line = f"  {name:<62} {result['seconds'] * 1000:9.2f} ms  {result['peak_bytes'] / 1024 / 1024:8.2f} MB peak"
+			baseline = baselines.get(key, {}).get(name)
+			if baseline:
+				ratio = result["seconds"] / baseline["seconds"]
+				peak_ratio = result["peak_bytes"] / max(baseline["peak_bytes"], 1)
+				line += f"  {ratio:5.2f}x / {peak_ratio:5.2f}x baseline"
+				if ratio > arguments.tolerance and result["seconds"] > MIN_COMPARED_SECONDS:
+					regressions.append(f"{key}: {name} is {ratio:.2f}x its baseline time")
+				if peak_ratio > arguments.tolerance and result["peak_bytes"] > MIN_COMPARED_BYTES:
+					regressions.append(f"{key}: {name} peaks at {peak_ratio:.2f}x its baseline memory")
+			print(line)
+
+	if arguments.save:
+		with open(BASELINES_PATH, "w") as file:
+			json.dump(results, file, indent=2, sort_keys=True)
+		print(f"Saved baselines to {BASELINES_PATH}")
+
+	if arguments.compare and regressions:
+		print("\n".join(["", "Regressions:"] + regressions))
+		sys.exit(1)
+
+
+if __name__ == "__main__":
+	main()
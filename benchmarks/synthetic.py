@@ -0,0 +1,57 @@
+# Synthetic stand-ins for the Airtable tables, for benchmarking the pipeline at sizes the real archive doesn't reach yet.
+#
+# scale=1 is 300 announcements of one to six items each, drawn from `items` items. Larger scales multiply the number of
+# announcements, as if more ghettos' records were added on the same calendar. Those cover nearly every day, so for
+# datasets with many days without food (which the clairvoyant strategy has to fill) the announcements can instead all
+# fall on a few of the calendar's days and last a day or three, with GAPS_DAYS and GAPS_DURATIONS.
+import random
+
+from rations.axes import CALENDAR
+
+
+BASE_ANNOUNCEMENTS = 300
+FOOD_GROUPS = ("Grains", "Vegetables", "Fats", "Sugars", "Meat", "Dairy", "Other")
+DURATIONS = ("5 days", "7 days (per coupon)", "10 days", "1 week", "2 weeks")
+GAPS_DAYS = 120
+GAPS_DURATIONS = ("1 days", "2 days", "3 days")
+
+
+def item_labels(items):
+	return [f"Item {index:04d} ({'kg' if index % 4 == 0 else 'g'})" for index in range(items)]
+
+
+def generate_announcements(scale=1, items=60, items_per_announcement=(1, 6), seed=0, days=None, durations=DURATIONS):
+	# `days`, if given, is how many of the calendar's days the announcements fall on, however many there are.
+	random_numbers = random.Random(seed)
+	labels = item_labels(items)
+	announcement_days = random_numbers.sample(range(len(CALENDAR)), days) if days else None
+	records = []
+	for index in range(BASE_ANNOUNCEMENTS * scale):
+		day = random_numbers.choice(announcement_days) if announcement_days else random_numbers.randrange(len(CALENDAR))
+		begin_date = CALENDAR.date(day + random_numbers.randrange(3))
+		fields = {
+			# Announcements are keyed by "Date", so each one gets a distinct key, as records from different places would.
+			"Date": f"{CALENDAR.date_string(day)} #{index}",
+			"Begin Date": begin_date.strftime("%Y-%m-%d"),
+			"Est. Duration": random_numbers.choice(durations),
+		}
+		for label in random_numbers.sample(labels, random_numbers.randint(*items_per_announcement)):
+			fields[label] = random_numbers.choice((0.5, 1, 2)) if "(kg)" in label else random_numbers.choice((50, 100, 250, 500))
+		records.append({"id": f"rec{index:08d}", "createdTime": "2020-11-01T00:00:00.000Z", "fields": fields})
+	return records
+
+
+def generate_caloric_values(items=60, seed=0):
+	random_numbers = random.Random(seed)
+	return [
+		{
+			"id": f"cal{index:06d}",
+			"createdTime": "2020-11-01T00:00:00.000Z",
+			"fields": {
+				"Label": label,
+				"Caloric Value (kcal/100g)": random_numbers.randrange(20, 900),
+				"Food Group": FOOD_GROUPS[index % len(FOOD_GROUPS)],
+			},
+		}
+		for index, label in enumerate(item_labels(items))
+	]
@@ -0,0 +1,19 @@
+# The headless rations engine:
+#
+# 	import rations
+# 	data = rations.load()
+# 	data.timeline("calories", "clairvoyant", 14)
+# 	data.days_without_food("mass", "even")
+#
+# The names below come from rations.engine. They are imported on first use, so running one of the command line modules
+# (`python -m rations.snapshot` etc.) doesn't import it twice.
+_ENGINE_NAMES = ("OVERLAPS", "STRATEGIES", "UNITS", "Rations", "days_without_food", "load", "timeline")
+
+__all__ = list(_ENGINE_NAMES)
+
+
+def __getattr__(name):
+	if name in _ENGINE_NAMES:
+		from rations import engine
+		return getattr(engine, name)
+	raise AttributeError(f"module 'rations' has no attribute {name!r}")
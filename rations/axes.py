@@ -0,0 +1,87 @@
+import numpy as np
+from datetime import date, datetime, timedelta
+
+
+# The first and last ration announcements in the dataset. Every timeline in the app is laid out on the days between
+# them, with day 0 being the first announcement.
+FIRST_ANNOUNCEMENT_DATE = date(1940, 3, 13)
+LAST_ANNOUNCEMENT_DATE = date(1944, 7, 18)
+
+
+class DateAxis:
+	# The date axis of a timeline: maps "YYYY-MM-DD" strings and dates to integer day offsets from `origin` and back.
+	# It is immutable, so one instance can be shared by every timeline laid out on the same days.
+	__slots__ = ("origin", "length", "dates", "strings", "_offsets")
+
+	def __init__(self, origin, length):
+		dates = np.arange(length, dtype="timedelta64[D]") + np.datetime64(origin, "D")
+		dates.flags.writeable = False
+		strings = tuple(np.datetime_as_string(dates, unit="D").tolist())
+		object.__setattr__(self, "origin", origin)
+		object.__setattr__(self, "length", length)
+		object.__setattr__(self, "dates", dates)
+		object.__setattr__(self, "strings", strings)
+		object.__setattr__(self, "_offsets", {string: offset for offset, string in enumerate(strings)})
+
+	def __setattr__(self, name, value):
+		raise AttributeError("DateAxis is immutable")
+
+	def __reduce__(self):
+		return (DateAxis, (self.origin, self.length))
+
+	def __len__(self):
+		return self.length
+
+	def offset(self, day):
+		# Dates outside the axis still get an offset (negative, or past the end) so callers can clip to it.
+		if isinstance(day, str):
+			offset = self._offsets.get(day)
+			if offset is not None:
+				return offset
+			day = datetime.strptime(day, "%Y-%m-%d").date()
+		return (day - self.origin).days
+
+	def span(self, first=None, last=None):
+		# The offsets [start, end) of the days from `first` to `last` (dates or "YYYY-MM-DD" strings, both included, None
+		# for either end of the axis), clipped to the axis.
+		start = 0 if first is None else max(self.offset(first), 0)
+		end = self.length if last is None else min(self.offset(last) + 1, self.length)
+		return start, max(end, start)
+
+	def between(self, first=None, last=None):
+		# The days from `first` to `last` (see span) as an axis of their own.
+		start, end = self.span(first, last)
+		if (start, end) == (0, self.length):
+			return self
+		return DateAxis(self.date(start), end - start)
+
+	def date(self, offset):
+		return self.origin + timedelta(days=int(offset))
+
+	def date_string(self, offset):
+		if 0 <= offset < self.length:
+			return self.strings[offset]
+		return self.date(offset).strftime("%Y-%m-%d")
+
+
+class ItemAxis:
+	# The item axis of a timeline: maps item labels (e.g. "Zucker/Sugar (g)") to column positions and back.
+	def __init__(self, items):
+		self.items = tuple(items)
+		self._positions = {item: position for position, item in enumerate(self.items)}
+
+	def __len__(self):
+		return len(self.items)
+
+	def __iter__(self):
+		return iter(self.items)
+
+	def __contains__(self, item):
+		return item in self._positions
+
+	def position(self, item):
+		return self._positions[item]
+
+
+# The calendar every formatter and calculator shares. Building it is the only time the app enumerates the days.
+CALENDAR = DateAxis(FIRST_ANNOUNCEMENT_DATE, (LAST_ANNOUNCEMENT_DATE - FIRST_ANNOUNCEMENT_DATE).days)
@@ -0,0 +1,153 @@
+import functools
+import hashlib
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+CACHE_DIRECTORY = os.environ.get("RATIONS_CACHE_DIR", "cache")
+MAX_CACHE_BYTES = int(os.environ.get("RATIONS_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+MAX_ENTRIES_IN_MEMORY = 32
+
+
+class ResultCache:
+	# Caches computed results under a key made from a fingerprint of the source data plus the call's (small) parameters,
+	# so a lookup never has to hash the large inputs themselves. Recently used results are kept in memory; every result
+	# is also pickled to disk, where the least recently used files are evicted once the directory outgrows `max_bytes`.
+	def __init__(self, directory=CACHE_DIRECTORY, max_bytes=MAX_CACHE_BYTES, max_entries_in_memory=MAX_ENTRIES_IN_MEMORY):
+		self.directory = directory
+		self.max_bytes = max_bytes
+		self.max_entries_in_memory = max_entries_in_memory
+		self._memory = OrderedDict()
+		self._lock = threading.Lock()
+
+	def key(self, name, fingerprint, params=()):
+		return hashlib.sha1(repr((name, fingerprint, params)).encode("utf-8")).hexdigest()
+
+	def get(self, key, default=None):
+		with self._lock:
+			if key in self._memory:
+				self._memory.move_to_end(key)
+				return self._memory[key]
+
+		path = self._path(key)
+		try:
+			with open(path, "rb") as file:
+				value = pickle.load(file)
+		except (OSError, EOFError, pickle.UnpicklingError):
+			return default
+		# Mark the file as recently used so eviction keeps it. It may have been evicted since it was read, which doesn't
+		# make what was read any less valid.
+		try:
+			os.utime(path)
+		except FileNotFoundError:
+			pass
+		self._remember(key, value)
+		return value
+
+	def put(self, key, value):
+		self._remember(key, value)
+		os.makedirs(self.directory, exist_ok=True)
+		# Write to a temporary file first so concurrent readers never see half a result.
+		temporary_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+		with open(temporary_path, "wb") as file:
+			pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+		os.replace(temporary_path, self._path(key))
+		self._evict()
+
+	def memoize(self, function):
+		# Decorates a function called as function(fingerprint, *params), where `fingerprint` identifies the source data
+		# and `params` are small values like the unit or the lookahead window. Results are also keyed by the source code
+		# of the function's module and of this package, so editing the calculations invalidates them.
+		name = (function.__module__, function.__qualname__, _source_digest(sys.modules.get(function.__module__)))
+
+		@functools.wraps(function)
+		def wrapper(fingerprint, *params):
+			key = self.key(name, fingerprint, params)
+			value = self.get(key, _MISSING)
+			if value is _MISSING:
+				value = function(fingerprint, *params)
+				self.put(key, value)
+			return value
+		return wrapper
+
+	def clear(self):
+		with self._lock:
+			self._memory.clear()
+		for name in self._cache_files():
+			os.remove(os.path.join(self.directory, name))
+
+	def _remember(self, key, value):
+		_freeze(value)
+		with self._lock:
+			self._memory[key] = value
+			self._memory.move_to_end(key)
+			while len(self._memory) > self.max_entries_in_memory:
+				self._memory.popitem(last=False)
+
+	def _path(self, key):
+		return os.path.join(self.directory, f"{key}.pickle")
+
+	def _cache_files(self):
+		try:
+			return [name for name in os.listdir(self.directory) if name.endswith(".pickle")]
+		except FileNotFoundError:
+			return []
+
+	def _evict(self):
+		files = []
+		for name in self._cache_files():
+			try:
+				status = os.stat(os.path.join(self.directory, name))
+			except FileNotFoundError:
+				continue
+			files.append((status.st_mtime, status.st_size, name))
+		total_bytes = sum(size for _, size, _ in files)
+		for _, size, name in sorted(files):
+			if total_bytes <= self.max_bytes:
+				break
+			try:
+				os.remove(os.path.join(self.directory, name))
+			except FileNotFoundError:
+				pass
+			total_bytes -= size
+
+
+_MISSING = object()
+
+
+def _freeze(value):
+	# Every caller gets the cached result itself, so its arrays are made read-only: one changing them in place would
+	# change them for all the others. Looks into tuples, lists, dicts and this package's own objects.
+	if isinstance(value, np.ndarray):
+		value.flags.writeable = False
+	elif isinstance(value, (tuple, list)):
+		for item in value:
+			_freeze(item)
+	elif isinstance(value, dict):
+		for item in value.values():
+			_freeze(item)
+	elif type(value).__module__.startswith("rations."):
+		for item in getattr(value, "__dict__", {}).values():
+			_freeze(item)
+
+
+def _source_digest(module):
+	digest = hashlib.sha1()
+	package_directory = os.path.dirname(os.path.abspath(__file__))
+	paths = [os.path.join(package_directory, name) for name in sorted(os.listdir(package_directory)) if name.endswith(".py")]
+	module_path = getattr(module, "__file__", None)
+	if module_path and os.path.abspath(module_path) not in paths:
+		paths.append(os.path.abspath(module_path))
+	for path in paths:
+		with open(path, "rb") as file:
+			digest.update(file.read())
+	return digest.hexdigest()
+
+
+# The cache the app and the command line tools share.
+RESULT_CACHE = ResultCache()
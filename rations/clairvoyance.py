@@ -0,0 +1,57 @@
+import numpy as np
+
+
+# The "ration-stretching" strategy: a resident who knows what is coming puts food aside so that no day goes without.
+# For every day without food, the days in the lookahead window before it give up food until they and the empty day
+# are level, like water settling between connected tanks.
+def redistribute_with_clairvoyance(total_by_day, lookahead_window=7, precision=None):
+	# `precision` is the smallest amount moved at once (e.g. 1 gram or 1 kcal). The default moves exact amounts.
+	total_by_day = np.array(total_by_day, dtype=np.float64)
+	for day_without_food in np.flatnonzero(total_by_day == 0):
+		start_day = max(day_without_food - lookahead_window, 0)
+		window = total_by_day[start_day:day_without_food]
+		if window.size == 0:
+			continue
+		donor_level, received = _level_window(window, precision)
+		if received <= 0:
+			continue
+		np.minimum(window, donor_level, out=window)
+		total_by_day[day_without_food] = received
+	return total_by_day
+
+
+def redistribution_span(total_by_day, lookahead_window, start, end):
+	# The days [first, last) to redistribute so that days [start, end) come out exactly as they would from redistributing
+	# the whole timeline. Food only moves back from an empty day into the `lookahead_window` days before it, so no day
+	# after end + lookahead_window reaches the range. Going back, if neither a day nor the lookahead_window - 1 days after
+	# it are empty, no empty day takes food from both sides of it, so the days before it can be left out.
+	empty_so_far = np.concatenate(([0], np.cumsum(np.asarray(total_by_day) == 0)))
+	candidates = np.arange(start + 1)
+	empty_ahead = empty_so_far[np.minimum(candidates + lookahead_window, len(total_by_day))] - empty_so_far[candidates]
+	separators = np.flatnonzero(empty_ahead == 0)
+	first = int(separators[-1]) if len(separators) else 0
+	return first, min(end + lookahead_window, len(total_by_day))
+
+
+def _level_window(window, precision=None):
+	# Returns the level the window's fuller days are cut down to and the amount the empty day receives in exchange.
+	#
+	# With the window sorted from most to least food, cutting the top k days down to a level L frees up
+	# sum(top k) - k * L. Levelling means the empty day ends up with exactly that much, so L = sum(top k) / (k + 1)
+	# for the first k where the next day already has no more than L.
+	by_most_available = np.sort(window)[::-1]
+	cumulative = np.cumsum(by_most_available)
+	next_day = np.append(by_most_available[1:], 0.0)
+	counts = np.arange(1, window.size + 1)
+	level = cumulative / (counts + 1)
+	k = int(np.argmax(next_day <= level))
+	received = level[k]
+	if precision is None:
+		return received, received
+
+	# Only whole multiples of `precision` are moved, so the donors are cut down to a level a little above the
+	# empty day's instead.
+	received = np.floor(received / precision) * precision
+	donor_level = (cumulative - received) / counts
+	k = int(np.argmax(next_day <= donor_level))
+	return donor_level[k], received
@@ -0,0 +1,134 @@
+from rations.axes import CALENDAR
+from rations.matrix import OVERLAPS
+from rations.pipeline import (
+	calculate_gaps,
+	calculate_inputs,
+	calculate_items,
+	calculate_number_of_days_without_food,
+	calculate_runs,
+	calculate_streaks_without_food,
+	calculate_sweep,
+	calculate_total,
+	calculate_total_between,
+)
+from rations.precompute import UNITS
+from rations.shared import open_timelines
+from rations.snapshot import snapshot_fingerprint
+from rations.streaks import GapIndex
+from rations.sweep import SWEEP_WINDOWS
+
+
+# "announced" puts each ration on the day it became effective, "even" spreads it over the days it was meant to last and
+# "clairvoyant" additionally stretches food into the empty days of a lookahead window.
+STRATEGIES = ("announced", "even", "clairvoyant")
+
+
+class Rations:
+	# The ration data and everything calculated from it, for one snapshot of the Airtable tables. The Streamlit app is a
+	# view over this; it can just as well be used from a notebook, a worker process or an API server. Nothing is
+	# calculated until it is asked for, and then only what's needed for it (see rations/pipeline.py); results are cached
+	# by the snapshot's fingerprint, so asking again, from this or any other Rations, is a lookup. Timelines published
+	# for the snapshot (see rations/shared.py) are read from the shared files instead.
+	def __init__(self, fingerprint, overlap="overwrite"):
+		self.fingerprint = fingerprint
+		self.overlap = overlap
+
+	@property
+	def calendar(self):
+		return CALENDAR
+
+	@property
+	def item_to_food_group(self):
+		return calculate_inputs(self.fingerprint)[3]
+
+	@property
+	def item_to_calories(self):
+		return calculate_inputs(self.fingerprint)[2]
+
+	def timeline(self, unit="calories", strategy="even", window=7, first=None, last=None):
+		# The total amount of food available each day, as an array over `calendar`. `window` only applies to the
+		# clairvoyant strategy. With `first` and/or `last` (dates or "YYYY-MM-DD" strings), only the days between them,
+		# over calendar.between(first, last); the clairvoyant strategy is then only calculated for those days and the
+		# lookahead margin they need, unless the whole timeline is at hand already.
+		_check(unit, strategy)
+		window = window if strategy == "clairvoyant" else None
+		start, end = self.calendar.span(first, last)
+		shared = open_timelines(self.fingerprint, self.overlap)
+		total = shared.total(unit, strategy, window) if shared is not None else None
+		if total is not None:
+			return total[start:end]
+		if (start, end) == (0, len(self.calendar)):
+			return calculate_total(self.fingerprint, self.overlap, unit, strategy, window)
+		return calculate_total_between(self.fingerprint, self.overlap, unit, strategy, window, start, end)
+
+	def items(self, unit="calories", strategy="even", first=None, last=None):
+		# The amount of each item available each day, as a day-by-item RationMatrix. Only the announced and even
+		# strategies are broken down by item. `first` and `last` narrow it down to a view of the days between them.
+		_check(unit, strategy)
+		if strategy == "clairvoyant":
+			raise ValueError("The clairvoyant strategy only redistributes daily totals, not individual items")
+		shared = open_timelines(self.fingerprint, self.overlap)
+		if shared is not None:
+			matrix = shared.items(unit, strategy)
+		else:
+			matrix = calculate_items(self.fingerprint, self.overlap, unit, strategy)
+		if first is None and last is None:
+			return matrix
+		return matrix.between(first, last)
+
+	def food_groups(self, unit="calories", strategy="even", first=None, last=None):
+		return self.items(unit, strategy, first, last).group_by(self.item_to_food_group)
+
+	def runs(self, unit="calories"):
+		# The even strategy's per-item timeline as a RationRuns (see rations/runs.py): the same data as
+		# items(unit, "even") as (start day, end day, rate) runs, expanded to days with .to_matrix() when needed.
+		_check(unit, "even")
+		return calculate_runs(self.fingerprint, self.overlap, unit)
+
+	def days_without_food(self, unit="calories", strategy="even", window=7, first=None, last=None):
+		return calculate_number_of_days_without_food(self.timeline(unit, strategy, window, first, last))
+
+	def gaps_without_food(self, unit="calories", strategy="even", window=7, first=None, last=None):
+		# The stretches without food as a GapIndex (see rations/streaks.py), e.g.
+		# .table(.between("1941-01-01", "1941-12-31", longer_than=7)) for the gaps of more than a week in 1941. With
+		# `first` and/or `last`, the index covers only the days between them, and gaps are cut off at either end.
+		_check(unit, strategy)
+		if self.calendar.span(first, last) == (0, len(self.calendar)):
+			return calculate_gaps(self.fingerprint, self.overlap, unit, strategy, window if strategy == "clairvoyant" else None)
+		announcements = calculate_inputs(self.fingerprint)[0]
+		return GapIndex.without_food(self.timeline(unit, strategy, window, first, last), announcements, self.calendar.between(first, last))
+
+	def sweep(self, unit="calories", windows=SWEEP_WINDOWS):
+		# The clairvoyant strategy for each lookahead window in `windows`, one row per window with its days without
+		# food, stretches, longest stretch and the mean and variance of the daily amounts. Runs on every core.
+		_check(unit, "clairvoyant")
+		return calculate_sweep(self.fingerprint, self.overlap, unit, tuple(windows))
+
+	def streaks_without_food(self, unit="calories", strategy="even", window=7, first=None, last=None):
+		# The runs of consecutive days without food as a Streaks (see rations/streaks.py): len() is their number, and
+		# .longest, .start_dates and .lengths describe them.
+		return calculate_streaks_without_food(self.timeline(unit, strategy, window, first, last), self.calendar.between(first, last))
+
+
+def _check(unit, strategy):
+	if unit not in UNITS:
+		raise ValueError(f"Unknown unit {unit!r}, expected one of {UNITS}")
+	if strategy not in STRATEGIES:
+		raise ValueError(f"Unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+
+
+def load(fingerprint=None, overlap="overwrite"):
+	# Loads the current snapshot (taking it first if there is none). `overlap` is how overlapping announcements of the
+	# same item combine, one of OVERLAPS: "overwrite" (the later one counts, as the app shows it) or "additive".
+	if overlap not in OVERLAPS:
+		raise ValueError(f"Unknown overlap {overlap!r}, expected one of {OVERLAPS}")
+	fingerprint = fingerprint or snapshot_fingerprint()
+	return Rations(fingerprint, overlap)
+
+
+def timeline(unit="calories", strategy="even", window=7):
+	return load().timeline(unit, strategy, window)
+
+
+def days_without_food(unit="calories", strategy="even", window=7):
+	return load().days_without_food(unit, strategy, window)
@@ -0,0 +1,110 @@
+import argparse
+
+import numpy as np
+
+from rations.matrix import OVERLAPS
+from rations.pipeline import calculate_timelines
+from rations.snapshot import snapshot_fingerprint
+
+
+# Every derived timeline is written to one table with this schema, one row per day per item (or per day for the daily
+# totals, whose item and food_group are null). window is the lookahead window of the clairvoyant strategy and null for
+# the others. kcal is null for items without a known caloric value.
+EXPORT_SCHEMA = (
+	("date", "date32"),
+	("item", "string"),
+	("food_group", "string"),
+	("grams", "float64"),
+	("kcal", "float64"),
+	("strategy", "string"),
+	("window", "int16"),
+)
+
+
+def export_columns(timelines):
+	# Lays the timelines out as the columns of EXPORT_SCHEMA, as NumPy arrays.
+	parts = []
+	for strategy in ("announced", "even"):
+		amount = timelines[f"item_to_date_to_{strategy}_amount"]
+		calories = timelines[f"item_to_date_to_{strategy}_calories"]
+		kcal = np.full(amount.values.shape, np.nan)
+		for item in calories.items:
+			kcal[:, amount.items.position(item)] = calories.column(item)
+		items = np.array(amount.items.items, dtype=object)
+		food_groups = np.array([timelines["item_to_food_group"].get(item) for item in amount.items], dtype=object)
+		parts.append(_columns(amount.calendar.dates, items, food_groups, amount.values, kcal, strategy, None))
+
+	calendar = timelines["item_to_date_to_even_amount"].calendar
+	no_item = np.array([None], dtype=object)
+	parts.append(_columns(calendar.dates, no_item, no_item, timelines["announced_amount"], timelines["announced_calories"], "announced", None))
+	series = timelines["strategy_series"]
+	for unit, strategy, window in series.keys:
+		if unit != "mass":
+			continue
+		grams = series.get("mass", strategy, window)
+		kcal = series.get("calories", strategy, window)
+		parts.append(_columns(calendar.dates, no_item, no_item, grams, kcal, strategy, window))
+
+	return {name: np.concatenate([part[name] for part in parts]) for name, _ in EXPORT_SCHEMA}
+
+
+def _columns(dates, items, food_groups, grams, kcal, strategy, window):
+	# `grams` and `kcal` are (days, items) matrices, or single daily series when there is one (null) item.
+	days = len(dates)
+	grams = np.asarray(grams, dtype=np.float64).reshape(days, -1)
+	kcal = np.asarray(kcal, dtype=np.float64).reshape(days, -1)
+	rows = days * len(items)
+	return {
+		"date": np.tile(dates, len(items)),
+		"item": np.repeat(items, days),
+		"food_group": np.repeat(food_groups, days),
+		"grams": grams.T.ravel(),
+		"kcal": kcal.T.ravel(),
+		"strategy": np.full(rows, strategy, dtype=object),
+		"window": np.full(rows, -1 if window is None else window, dtype=np.int16),
+	}
+
+
+def write_timelines(timelines, path, file_format="parquet"):
+	# pyarrow is only needed for exporting, so it is not a dependency of the app itself.
+	try:
+		import pyarrow
+		import pyarrow.feather
+		import pyarrow.parquet
+	except ImportError:
+		raise SystemExit("Exporting needs pyarrow: pip install pyarrow")
+
+	columns = export_columns(timelines)
+	schema = pyarrow.schema([(name, getattr(pyarrow, type_name)()) for name, type_name in EXPORT_SCHEMA])
+	arrays = []
+	for name, _ in EXPORT_SCHEMA:
+		field = schema.field(name)
+		if name == "window":
+			arrays.append(pyarrow.array(columns[name], type=field.type, mask=columns[name] < 0))
+		elif name == "kcal":
+			arrays.append(pyarrow.array(columns[name], type=field.type, from_pandas=True))
+		else:
+			arrays.append(pyarrow.array(columns[name], type=field.type))
+	table = pyarrow.Table.from_arrays(arrays, schema=schema)
+
+	if file_format == "parquet":
+		pyarrow.parquet.write_table(table, path)
+	else:
+		pyarrow.feather.write_feather(table, path, compression="uncompressed")
+	return table.num_rows
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Run the rations pipeline without Streamlit and export every derived timeline.")
+	parser.add_argument("output", help="file to write, e.g. rations.parquet")
+	parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet", help="Parquet, or the uncompressed Arrow IPC (Feather v2) format for memory-mapped reads")
+	parser.add_argument("--overlap", choices=OVERLAPS, default="overwrite", help="how overlapping announcements of the same item combine: the later one counts, or they add up")
+	arguments = parser.parse_args()
+
+	timelines = calculate_timelines(snapshot_fingerprint(), arguments.overlap)
+	rows = write_timelines(timelines, arguments.output, arguments.format)
+	print(f"Wrote {rows} rows to {arguments.output}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,104 @@
+import json
+import re
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+from rations.sources import PAGE_SIZE
+
+
+# The only filter formula the fake understands: the one SnapshotStore.sync uses to ask for recently modified records.
+MODIFIED_AFTER_FORMULA = re.compile(r"IS_AFTER\(LAST_MODIFIED_TIME\(\), '([^']+)'\)")
+
+
+class FakeAirtable:
+	# A local stand-in for the Airtable API's "list records" endpoint, so syncing and fetching can be exercised offline:
+	#
+	# 	with FakeAirtable({"Caloric Value": records}) as airtable:
+	# 		fetch_records("Caloric Value", api_url=airtable.api_url)
+	#
+	# It pages like Airtable (100 records at most, with an opaque offset) and can add `latency` seconds to every response
+	# to stand in for the network.
+	def __init__(self, tables, latency=0.0):
+		self.latency = latency
+		self.requests = 0
+		self._tables = {}
+		self._lock = threading.Lock()
+		for table_name, records in tables.items():
+			for record in records:
+				self.put(table_name, record)
+
+	def put(self, table_name, record):
+		# Adds or replaces a record, marking it as modified now.
+		modified = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+		with self._lock:
+			self._tables.setdefault(table_name, {})[record["id"]] = (modified, record)
+
+	def delete(self, table_name, record_id):
+		with self._lock:
+			del self._tables[table_name][record_id]
+
+	def list(self, table_name, modified_after=None):
+		with self._lock:
+			rows = list(self._tables.get(table_name, {}).values())
+		return [record for modified, record in rows if modified_after is None or modified > modified_after]
+
+	def __enter__(self):
+		self._server = ThreadingHTTPServer(("127.0.0.1", 0), _handler_for(self))
+		self._server.daemon_threads = True
+		self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+		self._thread.start()
+		self.api_url = f"http://127.0.0.1:{self._server.server_address[1]}/v0"
+		return self
+
+	def __exit__(self, *exc_info):
+		self._server.shutdown()
+		self._server.server_close()
+		self._thread.join()
+
+
+def _handler_for(airtable):
+	class Handler(BaseHTTPRequestHandler):
+		protocol_version = "HTTP/1.1"
+
+		def do_GET(self):
+			airtable.requests += 1
+			if airtable.latency:
+				time.sleep(airtable.latency)
+
+			url = urlparse(self.path)
+			parts = url.path.strip("/").split("/")
+			if len(parts) != 3 or parts[0] != "v0":
+				return self._respond(404, {"error": "NOT_FOUND"})
+			table_name = unquote(parts[2])
+			params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+			modified_after = None
+			if "filterByFormula" in params:
+				match = MODIFIED_AFTER_FORMULA.fullmatch(params["filterByFormula"])
+				if not match:
+					return self._respond(422, {"error": {"type": "INVALID_FILTER_BY_FORMULA"}})
+				modified_after = match.group(1)
+
+			records = airtable.list(table_name, modified_after)
+			start = int(params.get("offset", 0))
+			page_size = min(int(params.get("pageSize", PAGE_SIZE)), PAGE_SIZE)
+			page = {"records": records[start:start + page_size]}
+			if start + page_size < len(records):
+				page["offset"] = str(start + page_size)
+			self._respond(200, page)
+
+		def _respond(self, status, body):
+			payload = json.dumps(body).encode("utf-8")
+			self.send_response(status)
+			self.send_header("Content-Type", "application/json")
+			self.send_header("Content-Length", str(len(payload)))
+			self.end_headers()
+			self.wfile.write(payload)
+
+		def log_message(self, format, *args):
+			pass
+
+	return Handler
@@ -0,0 +1,62 @@
+import numpy as np
+import pandas
+
+
+# How finely the stacked charts are drawn: "daily" keeps every day on which some series changes, "weekly" averages
+# each series over 7-day bins (counted from the first day of the calendar) for a much smaller overview.
+RESOLUTIONS = ("daily", "weekly")
+
+DAYS_PER_BIN = 7
+
+
+def chart_frame(matrix, value_name="Amount", item_name="Item", resolution="daily"):
+	# The data for a stacked area chart of `matrix`, aggregated on the server so the browser only gets what it draws.
+	# Rations are piecewise constant and mostly zero, so instead of a row per item per day this keeps the rows for the
+	# days on which any item changes (draw with interpolate="step-after"); every item keeps a row on each of those days
+	# so the stack lines up. Items that are never available are dropped.
+	if resolution not in RESOLUTIONS:
+		raise ValueError(f"Unknown resolution {resolution!r}, expected one of {RESOLUTIONS}")
+	nonzero = matrix.values.any(axis=0)
+	values = matrix.values[:, nonzero]
+	labels = [item for item, keep in zip(matrix.items.items, nonzero) if keep]
+	dates = matrix.calendar.dates
+	if resolution == "weekly":
+		dates, values = weekly_bins(dates, values)
+	days = change_points(values)
+	return _long_frame(labels, dates[days], values[days], value_name, item_name)
+
+
+def change_points(values):
+	# The rows of a day-by-series array on which any series differs from the day before, plus the first and last day,
+	# so that a step chart through just these rows draws the same picture as one through every row.
+	if not len(values):
+		return np.arange(0)
+	changed = np.ones(len(values), dtype=bool)
+	changed[1:] = (values[1:] != values[:-1]).any(axis=1)
+	changed[-1] = True
+	return np.flatnonzero(changed)
+
+
+def weekly_bins(dates, values, days_per_bin=DAYS_PER_BIN):
+	# Averages a day-by-series array over consecutive bins of `days_per_bin` days. The last bin may be shorter and is
+	# averaged over the days it has, so the values stay amounts per day. Returns the first date of each bin and the means.
+	starts = np.arange(0, len(values), days_per_bin)
+	if not len(starts):
+		return dates[:0], values[:0]
+	lengths = np.diff(np.append(starts, len(values)))
+	return dates[starts], np.add.reduceat(values, starts, axis=0) / lengths[:, None]
+
+
+def _long_frame(labels, dates, values, value_name, item_name):
+	# Melts a day-by-series array into the long format Altair wants, one row per (series, day) with the series one after
+	# another:
+	#
+	# 	Item                Date          Amount
+	# 	"Zucker/Sugar (g)"  1940-03-13    0
+	# 	"Zucker/Sugar (g)"  1940-03-14    0
+	# 	...
+	return pandas.DataFrame({
+		item_name: np.repeat(np.array(labels, dtype=object), len(dates)),
+		"Date": np.tile(dates, len(labels)),
+		value_name: values.T.ravel(),
+	})
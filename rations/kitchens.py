@@ -0,0 +1,131 @@
+import functools
+import math
+import os
+
+import numpy as np
+import pandas
+
+
+# The kitchens of the ghetto as a table, one row per kitchen with its already geocoded position:
+#
+# 	name,address,latitude,longitude
+# 	"Kitchen 12","Franciszkańska 13",51.7847,19.4580
+#
+# The addresses come from the finding aid of RG-15.083M; they are geocoded once, offline, when the file is made, so the
+# app never calls a geocoder. Without the file the Kitchens tab shows the scanned map instead.
+KITCHENS_PATH = os.environ.get("RATIONS_KITCHENS_PATH", "kitchens.csv")
+
+# The side of a grid cell of the spatial index, in degrees. At Łódź's latitude that's about 550 m north to south and
+# 350 m east to west, a few kitchens per cell at most.
+CELL_DEGREES = 0.005
+
+EARTH_RADIUS_METRES = 6371008.8
+METRES_PER_DEGREE = math.pi * EARTH_RADIUS_METRES / 180
+
+# Distances are measured on the sphere but the grid is in degrees, whose length in metres varies a little across a
+# search; searches reach this much further than the conversion at the query's latitude says.
+SEARCH_MARGIN = 1.01
+
+
+class KitchenIndex:
+	# The kitchens with a uniform grid over their positions, so bounding box, radius and nearest-kitchen queries only
+	# look at the cells around the query instead of every kitchen. `frame` holds the kitchens in their original order
+	# and the queries return rows of it.
+	def __init__(self, frame, cell_degrees=CELL_DEGREES):
+		self.frame = frame.reset_index(drop=True)
+		self.cell_degrees = cell_degrees
+		self._latitudes = self.frame["latitude"].to_numpy(dtype=np.float64)
+		self._longitudes = self.frame["longitude"].to_numpy(dtype=np.float64)
+		self._cells = {}
+		latitude_cells = np.floor(self._latitudes / cell_degrees).astype(np.int64)
+		longitude_cells = np.floor(self._longitudes / cell_degrees).astype(np.int64)
+		for row, cell in enumerate(zip(latitude_cells.tolist(), longitude_cells.tolist())):
+			self._cells.setdefault(cell, []).append(row)
+
+	def __len__(self):
+		return len(self.frame)
+
+	def within_box(self, south, west, north, east):
+		# The kitchens inside the box, in their original order.
+		latitude_cells = range(self._cell(south), self._cell(north) + 1)
+		longitude_cells = range(self._cell(west), self._cell(east) + 1)
+		if len(latitude_cells) * len(longitude_cells) > len(self._cells):
+			# A box this big covers more cells than there are kitchens' cells; checking every kitchen is quicker.
+			rows = np.arange(len(self))
+		else:
+			rows = np.array(sorted(
+				row
+				for latitude_cell in latitude_cells
+				for longitude_cell in longitude_cells
+				for row in self._cells.get((latitude_cell, longitude_cell), ())
+			), dtype=np.int64)
+		inside = (
+			(self._latitudes[rows] >= south) & (self._latitudes[rows] <= north)
+			& (self._longitudes[rows] >= west) & (self._longitudes[rows] <= east)
+		)
+		return self.frame.iloc[rows[inside]]
+
+	def within(self, latitude, longitude, metres):
+		# The kitchens at most `metres` away, nearest first, with their distance in a "metres" column. The box searched
+		# is a little larger than the circle, since the degrees-to-metres conversion is only exact at `latitude`.
+		latitude_span = SEARCH_MARGIN * metres / METRES_PER_DEGREE
+		longitude_span = latitude_span / max(math.cos(math.radians(latitude)), 1e-6)
+		box = self.within_box(latitude - latitude_span, longitude - longitude_span, latitude + latitude_span, longitude + longitude_span)
+		return self._by_distance(box.index.to_numpy(), latitude, longitude, metres)
+
+	def nearest(self, latitude, longitude, count=1):
+		# The `count` kitchens nearest to the point, nearest first, with their distance in a "metres" column. Searches
+		# rings of cells outwards until no cell further out can hold anything nearer.
+		count = min(count, len(self))
+		latitude_cell, longitude_cell = self._cell(latitude), self._cell(longitude)
+		# Anything outside ring r is at least r cells away along one of the axes, and east-west cells are the narrower.
+		cell_metres = self.cell_degrees * METRES_PER_DEGREE * max(math.cos(math.radians(latitude)), 1e-6) / SEARCH_MARGIN
+		rows = []
+		ring = 0
+		while count and (2 * ring + 1) ** 2 <= len(self._cells):
+			rows.extend(
+				row
+				for latitude_offset in range(-ring, ring + 1)
+				for longitude_offset in range(-ring, ring + 1)
+				if max(abs(latitude_offset), abs(longitude_offset)) == ring
+				for row in self._cells.get((latitude_cell + latitude_offset, longitude_cell + longitude_offset), ())
+			)
+			if len(rows) >= count:
+				found = self._by_distance(np.array(rows, dtype=np.int64), latitude, longitude)
+				if found["metres"].iloc[count - 1] <= ring * cell_metres:
+					return found.iloc[:count]
+			ring += 1
+		# The rings have grown past the number of occupied cells (the point is far from the kitchens, or there are few
+		# of them), so measure every kitchen instead.
+		return self._by_distance(np.arange(len(self)), latitude, longitude).iloc[:count]
+
+	def _cell(self, degrees):
+		return int(math.floor(degrees / self.cell_degrees))
+
+	def _by_distance(self, rows, latitude, longitude, metres=math.inf):
+		distances = haversine_metres(latitude, longitude, self._latitudes[rows], self._longitudes[rows])
+		order = np.argsort(distances, kind="stable")
+		order = order[distances[order] <= metres]
+		return self.frame.iloc[rows[order]].assign(metres=distances[order])
+
+
+def haversine_metres(latitude, longitude, latitudes, longitudes):
+	latitude, longitude, latitudes, longitudes = map(np.radians, (latitude, longitude, latitudes, longitudes))
+	a = np.sin((latitudes - latitude) / 2) ** 2 + np.cos(latitude) * np.cos(latitudes) * np.sin((longitudes - longitude) / 2) ** 2
+	return 2 * EARTH_RADIUS_METRES * np.arcsin(np.sqrt(a))
+
+
+def load_kitchens(path=KITCHENS_PATH):
+	# The kitchens file as a KitchenIndex, parsed once per change of the file.
+	return _read_kitchens(os.path.abspath(path), os.stat(path).st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=4)
+def _read_kitchens(path, modified):
+	frame = pandas.read_csv(
+		path,
+		encoding="utf-8-sig",
+		usecols=["name", "address", "latitude", "longitude"],
+		dtype={"name": str, "address": str, "latitude": np.float64, "longitude": np.float64},
+	)
+	return KitchenIndex(frame.dropna(subset=["latitude", "longitude"]))
@@ -0,0 +1,188 @@
+import numpy as np
+
+from rations.axes import CALENDAR, ItemAxis
+
+
+# How overlapping announcements of the same item combine; see build_even_matrix.
+OVERLAPS = ("overwrite", "additive")
+
+
+class RationMatrix:
+	# A ration timeline stored as a dense (days, items) float64 array. values[day, column] is the amount of
+	# items.items[column] available on calendar day `day`. Totals, per-item and per-food-group views are all reductions
+	# over this one array.
+	def __init__(self, values, items, calendar=CALENDAR):
+		self.values = np.ascontiguousarray(values, dtype=np.float64)
+		self.items = items
+		self.calendar = calendar
+
+	@classmethod
+	def zeros(cls, items, calendar=CALENDAR):
+		return cls(np.zeros((len(calendar), len(items))), items, calendar)
+
+	@classmethod
+	def wrap(cls, values, items, calendar=CALENDAR):
+		# Takes `values` as they are instead of as a float64 copy, so a memory-mapped matrix (see rations/matrix_file.py)
+		# stays mapped and a slice of one stays a view.
+		matrix = cls.__new__(cls)
+		matrix.values = values
+		matrix.items = items
+		matrix.calendar = calendar
+		return matrix
+
+	def column(self, item):
+		return self.values[:, self.items.position(item)]
+
+	def between(self, first=None, last=None):
+		# The days from `first` to `last` (dates or "YYYY-MM-DD" strings, both included, None for either end) as a matrix
+		# on a calendar of its own. The rows of a range of days are contiguous, so this is a view, not a copy.
+		start, end = self.calendar.span(first, last)
+		return RationMatrix.wrap(self.values[start:end], self.items, self.calendar.between(first, last))
+
+	def total(self):
+		return self.values.sum(axis=1, dtype=np.float64)
+
+	def select(self, items):
+		items = [item for item in items if item in self.items]
+		columns = [self.items.position(item) for item in items]
+		return RationMatrix(self.values[:, columns], ItemAxis(items), self.calendar)
+
+	def scale(self, item_to_factor):
+		# Multiplies each item's column by its factor. Items without a factor are dropped.
+		scaled = self.select(item_to_factor.keys())
+		factors = np.array([item_to_factor[item] for item in scaled.items], dtype=np.float64)
+		scaled.values *= factors
+		return scaled
+
+	def group_by(self, item_to_group):
+		# Sums item columns into one column per group. Items without a group are dropped.
+		grouped = self.select(item_to_group.keys())
+		groups = ItemAxis(sorted(set(item_to_group[item] for item in grouped.items)))
+		membership = np.zeros((len(grouped.items), len(groups)))
+		for column, item in enumerate(grouped.items):
+			membership[column, groups.position(item_to_group[item])] = 1
+		return RationMatrix(grouped.values @ membership, groups, self.calendar)
+
+
+def build_announced_matrix(announcements, items, calendar=CALENDAR, overlap="overwrite"):
+	# Puts each announced ration on the single day it became effective. Every run is one day long, so they are added
+	# straight into their cells (after "overwrite" has left at most one run per cell).
+	columns, starts, _, rates = announcement_runs(announcements, items, calendar, overlap, spread=False)
+	size = len(calendar) * len(items)
+	values = np.bincount(starts.astype(np.int64) * len(items) + columns, rates, size).reshape(len(calendar), len(items))
+	return RationMatrix(values, items, calendar)
+
+
+def build_even_matrix(announcements, items, calendar=CALENDAR, overlap="overwrite"):
+	# Spreads each announced ration evenly over the days of its estimated duration. Where announcements of the same item
+	# overlap, `overlap` decides what is available: "overwrite" keeps the later announcement, "additive" adds them up.
+	runs = announcement_runs(announcements, items, calendar, overlap)
+	return RationMatrix(accumulate_runs(*runs, len(calendar), len(items)), items, calendar)
+
+
+def announcement_runs(announcements, items, calendar=CALENDAR, overlap="overwrite", spread=True):
+	# The announcements as (columns, starts, ends, rates) arrays of runs: items.items[columns[i]] is available at
+	# rates[i] per day on the calendar days [starts[i], ends[i]). With `spread` each ration lasts its estimated duration,
+	# otherwise it is all available on its first day. Runs are clipped to the calendar; see build_even_matrix for `overlap`.
+	if overlap not in OVERLAPS:
+		raise ValueError(f"Unknown overlap {overlap!r}, expected one of {OVERLAPS}")
+	columns, amounts, counts, starts, durations = [], [], [], [], []
+	for announcement_info in announcements.values():
+		ration = announcement_info["items"]
+		columns.extend(map(items.position, ration))
+		amounts.extend(ration.values())
+		counts.append(len(ration))
+		starts.append(calendar.offset(announcement_info["start_date"]))
+		durations.append(announcement_info["duration_in_days"] if spread else 1)
+	columns = np.array(columns, dtype=np.int32)
+	starts = np.repeat(np.array(starts, dtype=np.int32), counts)
+	durations = np.repeat(np.array(durations, dtype=np.int32), counts)
+	rates = np.array(amounts, dtype=np.float64) / durations
+	ends = np.minimum(starts + durations, len(calendar)).astype(np.int32)
+	starts = np.maximum(starts, 0)
+	inside = starts < ends
+	runs = columns[inside], starts[inside], ends[inside], rates[inside]
+	if overlap == "overwrite":
+		runs = _overwrite(*runs, len(calendar))
+	columns, starts, ends, rates = runs
+	nonzero = rates != 0
+	return columns[nonzero], starts[nonzero], ends[nonzero], rates[nonzero]
+
+
+def accumulate_runs(columns, starts, ends, rates, days, width):
+	# Adds up runs into a (days, width) array with difference arrays: each run adds its rate at its start and takes it off
+	# again at its end, and a cumulative sum over the days gives the amounts, in O(runs + days) per column.
+	size = (days + 1) * width
+	opened = starts.astype(np.int64) * width + columns
+	closed = ends.astype(np.int64) * width + columns
+	values = np.bincount(opened, rates, size) - np.bincount(closed, rates, size)
+	active = np.bincount(opened, minlength=size) - np.bincount(closed, minlength=size)
+	values = values.reshape(days + 1, width)
+	active = active.reshape(days + 1, width)
+	values = np.cumsum(values[:-1], axis=0)
+	# Adding a rate and taking it off again can leave a rounding error behind, so days without a run are set to an exact
+	# zero; the days without food are counted by comparing with zero.
+	values[np.cumsum(active[:-1], axis=0) == 0] = 0
+	return values
+
+
+def _overwrite(columns, starts, ends, rates, days):
+	# Cuts the runs (given in the order they were announced) so that later ones overwrite earlier ones of the same
+	# column. The starts and ends of a column's runs cut it into segments that every run either covers whole or not at
+	# all, and each segment goes to the last run covering it. To find that run without listing every run a segment is
+	# covered by (there are as many of those as there are days when rations overlap a lot), the runs are put into a
+	# segment tree over the segments: a run's segments are covered by O(log segments) nodes of the tree, each node keeps
+	# the last run put into it, and a segment's run is the last one kept by any node above it. Runs are never expanded
+	# into days, so this takes time and memory in proportion to the runs, however much they overlap.
+	if not len(columns):
+		return columns, starts, ends, rates
+	# Boundaries are numbered column by column, so one sorted array holds every column's.
+	stride = days + 1
+	opened = columns.astype(np.int64) * stride + starts
+	closed = columns.astype(np.int64) * stride + ends
+	boundaries = np.unique(np.concatenate((opened, closed)))
+	segments = len(boundaries) - 1
+	levels = max(segments - 1, 0).bit_length()
+
+	# kept[level][node] is the last run put into the node covering segments [node << level, (node + 1) << level).
+	kept = [np.full((1 << levels) >> level, -1, dtype=np.int32) for level in range(levels + 1)]
+	low = np.searchsorted(boundaries, opened).astype(np.int32)
+	high = np.searchsorted(boundaries, closed).astype(np.int32)
+	run = np.arange(len(columns), dtype=np.int32)
+	for level in range(levels + 1):
+		# The usual bottom-up walk of a segment tree, for every run at once: an odd bound's node is the run's, and the
+		# rest of its range moves up a level.
+		left = (low & 1) == 1
+		right = (high & 1) == 1
+		nodes = np.concatenate((low[left], high[right] - 1))
+		_keep_last(kept[level], nodes, np.concatenate((run[left], run[right])))
+		low = (low + left) >> 1
+		high = high >> 1
+		remaining = low < high
+		low, high, run = low[remaining], high[remaining], run[remaining]
+	for level in range(levels, 0, -1):
+		np.maximum(kept[level - 1], np.repeat(kept[level], 2), out=kept[level - 1])
+
+	run = kept[0][:segments]
+	segment = np.flatnonzero(run >= 0)
+	run = run[segment]
+	joined = np.append(True, (segment[1:] != segment[:-1] + 1) | (run[1:] != run[:-1]))
+	opened = boundaries[segment[joined]]
+	closed = boundaries[segment[np.append(joined[1:], True)] + 1]
+	return (
+		(opened // stride).astype(np.int32),
+		(opened % stride).astype(np.int32),
+		(closed % stride).astype(np.int32),
+		rates[run[joined]],
+	)
+
+
+def _keep_last(kept, nodes, runs):
+	# kept[node] = the latest of kept[node] and the runs put into the node. Runs are numbered in announcement order, so
+	# the latest is the largest; sorting by node and then run puts it last among the node's.
+	if not len(nodes):
+		return
+	order = np.lexsort((runs, nodes))
+	nodes, runs = nodes[order], runs[order]
+	last = np.append(nodes[1:] != nodes[:-1], True)
+	kept[nodes[last]] = np.maximum(kept[nodes[last]], runs[last])
@@ -0,0 +1,70 @@
+import json
+import os
+import struct
+import tempfile
+from datetime import date
+
+import numpy as np
+
+from rations.axes import CALENDAR, DateAxis, ItemAxis
+from rations.matrix import RationMatrix
+
+
+# A day-by-item matrix on disk, laid out so that it can be memory-mapped as it is:
+#
+# 	MAGIC                     8 bytes, the last one the version of the layout
+# 	header length             4 bytes, little-endian
+# 	header                    UTF-8 JSON: {"origin": "1940-03-13", "days": 1588, "items": ["Zucker/Sugar (g)", ...],
+# 	                          "dtype": "<f4"}, padded with spaces so the matrix starts at a multiple of ALIGNMENT
+# 	matrix                    days x items little-endian floats of the header's dtype, one row per day
+#
+# Rows are days, so the days between two dates are one contiguous block and a date range of one item is a strided view
+# of it; neither reads the rest of the file. float32, the default, keeps grams and kcal to well under a gram or kcal and
+# halves the size of the float64 matrices the calculations work with; float64 keeps them exactly. Files without a
+# dtype in their header are float32.
+MAGIC = b"RATIONS\x01"
+ALIGNMENT = 64
+DTYPE = np.dtype("<f4")
+
+
+def write_matrix_file(path, matrix, dtype=DTYPE):
+	# Written to a scratch file next to `path` and renamed into place, so a reader never maps half a matrix.
+	dtype = np.dtype(dtype).newbyteorder("<")
+	header = json.dumps({
+		"origin": matrix.calendar.origin.isoformat(),
+		"days": len(matrix.calendar),
+		"items": list(matrix.items),
+		"dtype": dtype.str,
+	}).encode("utf-8")
+	header += b" " * (-(len(MAGIC) + 4 + len(header)) % ALIGNMENT)
+	descriptor, scratch = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".matrix-")
+	try:
+		with os.fdopen(descriptor, "wb") as file:
+			file.write(MAGIC)
+			file.write(struct.pack("<I", len(header)))
+			file.write(header)
+			file.write(np.ascontiguousarray(matrix.values, dtype=dtype).tobytes())
+		os.replace(scratch, path)
+	except BaseException:
+		os.remove(scratch)
+		raise
+
+
+def read_matrix_file(path):
+	# The matrix as a RationMatrix whose values are a read-only map of the file: nothing is read until it is used, and
+	# processes reading the same file share its pages.
+	with open(path, "rb") as file:
+		if file.read(len(MAGIC)) != MAGIC:
+			raise ValueError(f"{path} is not a rations matrix file")
+		header_length, = struct.unpack("<I", file.read(4))
+		header = json.loads(file.read(header_length).decode("utf-8"))
+	origin = date.fromisoformat(header["origin"])
+	calendar = CALENDAR if (origin, header["days"]) == (CALENDAR.origin, len(CALENDAR)) else DateAxis(origin, header["days"])
+	shape = (header["days"], len(header["items"]))
+	dtype = np.dtype(header.get("dtype", DTYPE))
+	if shape[0] * shape[1] == 0:
+		# An empty file can't be mapped.
+		values = np.zeros(shape, dtype=dtype)
+	else:
+		values = np.asarray(np.memmap(path, dtype=dtype, mode="r", offset=len(MAGIC) + 4 + header_length, shape=shape))
+	return RationMatrix.wrap(values, ItemAxis(header["items"]), calendar)
@@ -0,0 +1,44 @@
+import functools
+import os
+from collections import namedtuple
+
+import numpy as np
+import pandas
+
+
+# The heating materials and other non-foodstuffs table the Non-Foodstuffs tab shows, one row per announcement date and
+# one column per material. Empty cells are announcements that didn't include the material.
+HEATING_MATERIALS_PATH = "heating_materials.csv"
+
+MATERIALS = (
+	"Soda (g)",
+	"Saccharin (tabl)",
+	"Kohlenstaub/Coal dust (kg)",
+	"Kohlen/Coal (kg)",
+	"Koksgrus (kg)",
+)
+
+# `wide` is indexed by date with a float32 column per material. `long` is the same data melted into
+# (Date, Material, Amount) rows for Altair, without the empty cells.
+HeatingMaterials = namedtuple("HeatingMaterials", ["wide", "long"])
+
+
+def load_heating_materials(path=HEATING_MATERIALS_PATH):
+	# Parses the file once and hands out the same frames until its modification time changes, so a rerun of the app
+	# costs a stat instead of a read. The frames are shared, so don't modify them.
+	return _read_heating_materials(os.path.abspath(path), os.stat(path).st_mtime_ns)
+
+
+@functools.lru_cache(maxsize=4)
+def _read_heating_materials(path, modified):
+	wide = pandas.read_csv(
+		path,
+		encoding="utf-8-sig",
+		usecols=("Date",) + MATERIALS,
+		dtype={material: np.float32 for material in MATERIALS},
+		parse_dates=["Date"],
+		index_col="Date",
+	)
+	long = wide.reset_index().melt("Date", var_name="Material", value_name="Amount").dropna(subset=["Amount"])
+	long["Material"] = long["Material"].astype("category")
+	return HeatingMaterials(wide, long.reset_index(drop=True))
@@ -0,0 +1,318 @@
+import functools
+import numpy as np
+from collections import OrderedDict
+
+from rations.axes import CALENDAR, ItemAxis
+from rations.cache import RESULT_CACHE
+from rations.clairvoyance import redistribute_with_clairvoyance, redistribution_span
+from rations.matrix import build_announced_matrix, build_even_matrix
+from rations.precompute import LOOKAHEAD_WINDOWS, UNITS, StrategySeries
+from rations.runs import build_even_runs
+from rations.snapshot import load_tables
+from rations.streaks import GapIndex, Streaks
+from rations.sweep import sweep_windows
+from rations.sources import CALORIC_VALUES_TABLE_NAME, RATIONS_TABLE_NAME
+
+
+INEDIBLE_RATIONS = [
+	"gespaltenem Holz/Split Wood",
+	"Koksgrus (kg)",
+	"Kohlen/Coal (kg)",
+	"Kohlenstaub/Coal dust (kg)",
+	"Streichhölzer/Matches (schachtel)",
+	"Fliegenfänger (stück)",
+	"Waschpulver (päcken)",
+	"Waschsoda (g)",
+	"Waschmittel \"Sil\" (300 g/pack)",
+	"Seife/Soap (stück)",
+]
+
+FUEL = [
+	"gespaltenem Holz/Split Wood",
+	"Koksgrus (kg)",
+	"Kohlen/Coal (kg)",
+	"Kohlenstaub/Coal dust (kg)",
+	"Saccharin (tabl)",
+	"Soda (g)"
+]
+
+#############################
+# Airtable-related functions:
+#############################
+# Both tables are read from the local snapshot (see rations/snapshot.py), which `python -m rations.snapshot` keeps in
+# sync with Airtable. Nothing here waits on the network unless the snapshot has never been taken, and then both tables
+# are fetched at the same time.
+def get_rations_and_caloric_values_from_airtable():
+	return load_tables([RATIONS_TABLE_NAME, CALORIC_VALUES_TABLE_NAME])
+
+def format_rations_data_from_airtable(rations_data_from_airtable):
+	# Filter out rations like coal, firewood, etc that can't be eaten.
+	return _format_announcements(rations_data_from_airtable, lambda key: key not in INEDIBLE_RATIONS)
+
+def format_fuel_data_from_airtable(rations_data_from_airtable):
+	return _format_announcements(rations_data_from_airtable, lambda key: key in FUEL)
+
+def _format_announcements(rations_data_from_airtable, is_wanted):
+	# Returns the announcements keyed by date along with the axis of every distinct item they mention. The dates
+	# themselves are resolved against the shared CALENDAR when the timelines are built, so nothing here is per-day.
+	announcements = {}
+	distinct_items = {}
+	for thing in rations_data_from_airtable:
+		data = thing["fields"]
+
+		if "Begin Date" in data:
+			start_date = data["Begin Date"]
+		else:
+			# Assume effective immediately
+			start_date = data["Date"]
+
+		if "Est. Duration" in data:
+			# "Est. Duration" appears in the Airtable usually as "X days"/"X days (per coupon)"/"X week"
+			# Because it was always formatted this way, we can always rely on the number (of days)
+			# being the numerical value before the first whitespace
+			duration_in_days = int(data["Est. Duration"].split(" ")[0])
+			if "week" in data["Est. Duration"]:
+				duration_in_days *= 7
+		else:
+			# Assume 10 day duration otherwise
+			duration_in_days = 10
+
+		items = {}
+		for key in data:
+			if not is_wanted(key):
+				continue
+			if "(g)" in key or "(kg)" in key:
+				distinct_items[key] = None
+
+				if "(g)" in key:
+					items[key] = data[key]
+				if "(kg)" in key:
+					items[key] = data[key] * 1000
+
+		announcements[data["Date"]] = {
+			"start_date": start_date,
+			"duration_in_days": duration_in_days,
+			"items": items,
+		}
+	announcements = OrderedDict(sorted(announcements.items()))
+
+	return announcements, ItemAxis(distinct_items)
+
+def format_caloric_values_from_airtable(caloric_values_from_airtable):
+	item_to_calories = {}
+	item_to_food_group = {}
+	for thing in caloric_values_from_airtable:
+		data = thing["fields"]
+
+		item = data["Label"]
+		kcals_per_100g = data["Caloric Value (kcal/100g)"]
+		item_to_calories[item] = kcals_per_100g
+
+		food_group = data["Food Group"]
+		item_to_food_group[item] = food_group
+	return item_to_calories, item_to_food_group
+
+
+
+
+
+########################################################################
+# Functions that do math to create dictionary datasets in helpful format
+# (calculations, data transformations, augmentations):
+########################################################################
+# Each calculation below is cached on its own, keyed by the snapshot's fingerprint and its parameters, and only runs
+# when something asks for it: showing the even calories computes the calorie matrix and its total, but not the
+# announced timelines, the mass timelines or any clairvoyant series. `overlap` says how overlapping announcements of the
+# same item combine: "overwrite" (the later one counts) or "additive" (see rations/matrix.py). The memoized functions
+# are called with positional arguments only, since those make up the cache key.
+@RESULT_CACHE.memoize
+def calculate_inputs(fingerprint):
+	# 1) Read the Airtable tables from the local snapshot.
+	rations_data_from_airtable, caloric_values_from_airtable = get_rations_and_caloric_values_from_airtable()
+
+	# 2) Format the raw announcements from Airtable into a more workable form. Desired dictionary format:
+	#
+	# {
+	# 	"1940-12-24": {
+	# 		"start_date": "1940-12-25",
+	# 		"duration": "5 days",
+	# 		"items": {
+	# 			"Zucker/Sugar (g)": 250,
+	# 			"Salz/Salt (g)": 150
+	# 		},
+	# 	},
+	# 	"1940-12-30": {
+	# 		"start_date": "1940-12-30",
+	# 		"duration": "1 day",
+	# 		"items": {
+	# 			"Zucker/Sugar (g)": 50,
+	# 		},
+	# 	},
+	# }
+	#
+	# along with the axis of every distinct item mentioned in the announcements.
+	announcements, items = format_rations_data_from_airtable(rations_data_from_airtable)
+	#announcements, items = format_fuel_data_from_airtable(rations_data_from_airtable)
+
+	# 3) Format the caloric data from Airtable into a more workable form. Desired dictionary format:
+	#
+	# {
+	# 	"Butter (g)": 150,
+	# 	"Kohlrabi (g)": 37,
+	# }
+	item_to_calories, item_to_food_group = format_caloric_values_from_airtable(caloric_values_from_airtable)
+
+	return announcements, items, item_to_calories, item_to_food_group
+
+
+@RESULT_CACHE.memoize
+def calculate_items(fingerprint, overlap, unit, strategy):
+	# The amount ("mass") or calories of each item available each day under the announced or even strategy.
+	announcements, items, item_to_calories, _ = calculate_inputs(fingerprint)
+
+	# 4) Transform the 'announcements' dictionary into a day-by-item matrix of amounts (see rations/matrix.py):
+	#
+	#               "Zucker/Sugar (g)"  "Salz/Salt (g)"  ...
+	# 1940-03-13    0                   0
+	# ...
+	# 1940-12-25    50                  30
+	# 1940-12-26    50                  30
+	# ...
+	#
+	# Each row is a day of the calendar (day 0 is the first announcement) and each column is a provision, holding the
+	# amount available of that provision on that day.
+	if unit == "mass":
+		if strategy == "announced":
+			return calculate_announced_amount_per_item_per_day(announcements, items, overlap)
+		return calculate_available_rations_per_item_per_day(announcements, items, overlap)
+
+	# 5) Perform a similar transformation with the caloric data, giving a day-by-item matrix of calories. Items without
+	# a known caloric value are left out.
+	return calculate_available_calories_per_item_per_day(calculate_items(fingerprint, overlap, "mass", strategy), item_to_calories)
+
+
+@RESULT_CACHE.memoize
+def calculate_runs(fingerprint, overlap, unit):
+	# The even timelines as runs of constant rations (see rations/runs.py), a few per announcement instead of a value
+	# per item per day.
+	announcements, items, item_to_calories, _ = calculate_inputs(fingerprint)
+	if unit == "calories":
+		return calculate_available_calories_per_item_per_day(calculate_runs(fingerprint, overlap, "mass"), item_to_calories)
+	return calculate_available_rations_runs_per_item(announcements, items, overlap)
+
+
+@RESULT_CACHE.memoize
+def calculate_total(fingerprint, overlap, unit, strategy, window):
+	# The total amount of food available each day. `window` is the lookahead window of the clairvoyant strategy and
+	# None for the others.
+	#
+	# 8) With a 'Clairvoyant' (ration-stretching) strategy, food is stretched from the even totals into the empty days
+	# of the lookahead window.
+	if strategy == "clairvoyant":
+		return calculate_total_available_over_time_with_clairvoyance(calculate_total(fingerprint, overlap, unit, "even", None), window)
+
+	# 6) and 7) The total announced on each announcement date, or available each day with the even strategy.
+	return calculate_items(fingerprint, overlap, unit, strategy).total()
+
+
+@functools.lru_cache(maxsize=16)
+def calculate_total_between(fingerprint, overlap, unit, strategy, window, start, end):
+	# The days [start, end) of calculate_total(fingerprint, overlap, unit, strategy, window). The clairvoyant strategy
+	# only redistributes the days that can affect them (see redistribution_span), so a narrow range costs little. Not
+	# in the result cache, since there are as many ranges as positions of the app's date slider, but the last few are
+	# kept in memory: the timeline, gaps and streaks of one range are all calculated from the same total. Read-only,
+	# since it is shared.
+	if strategy != "clairvoyant":
+		total = calculate_total(fingerprint, overlap, unit, strategy, None)[start:end]
+	else:
+		even_total = calculate_total(fingerprint, overlap, unit, "even", None)
+		first, last = redistribution_span(even_total, window, start, end)
+		total = calculate_total_available_over_time_with_clairvoyance(even_total[first:last], window)[start - first:end - first]
+	total.flags.writeable = False
+	return total
+
+
+@RESULT_CACHE.memoize
+def calculate_gaps(fingerprint, overlap, unit, strategy, window):
+	# Every stretch without food in the total of calculate_total(fingerprint, overlap, unit, strategy, window), indexed
+	# for queries by date and length (see rations/streaks.py).
+	announcements = calculate_inputs(fingerprint)[0]
+	return GapIndex.without_food(calculate_total(fingerprint, overlap, unit, strategy, window), announcements)
+
+
+@RESULT_CACHE.memoize
+def calculate_sweep(fingerprint, overlap, unit, windows):
+	# The clairvoyant strategy for every lookahead window in `windows` (a tuple), compared in one frame; see
+	# rations/sweep.py.
+	return sweep_windows(calculate_total(fingerprint, overlap, unit, "even", None), windows)
+
+
+def calculate_timelines(fingerprint, overlap="overwrite", lookahead_windows=LOOKAHEAD_WINDOWS):
+	# Every timeline at once, for the export (see rations/export.py). Built from the calculations above, so it shares
+	# their cache.
+	_, _, item_to_calories, item_to_food_group = calculate_inputs(fingerprint)
+	keys = []
+	for unit in UNITS:
+		keys.append((unit, "even", None))
+		keys.extend((unit, "clairvoyant", window) for window in lookahead_windows)
+	strategy_series = StrategySeries(keys, np.vstack([calculate_total(fingerprint, overlap, *key) for key in keys]))
+	return {
+		"item_to_calories": item_to_calories,
+		"item_to_food_group": item_to_food_group,
+		"item_to_date_to_announced_amount": calculate_items(fingerprint, overlap, "mass", "announced"),
+		"item_to_date_to_announced_calories": calculate_items(fingerprint, overlap, "calories", "announced"),
+		"item_to_date_to_even_amount": calculate_items(fingerprint, overlap, "mass", "even"),
+		"item_to_date_to_even_calories": calculate_items(fingerprint, overlap, "calories", "even"),
+		"item_to_even_amount_runs": calculate_runs(fingerprint, overlap, "mass"),
+		"item_to_even_calories_runs": calculate_runs(fingerprint, overlap, "calories"),
+		"announced_amount": calculate_total(fingerprint, overlap, "mass", "announced", None),
+		"announced_calories": calculate_total(fingerprint, overlap, "calories", "announced", None),
+		"even_amount": calculate_total(fingerprint, overlap, "mass", "even", None),
+		"even_calories": calculate_total(fingerprint, overlap, "calories", "even", None),
+		"strategy_series": strategy_series,
+	}
+
+
+def calculate_announced_amount_per_item_per_day(announcements, items, overlap="overwrite"):
+	return build_announced_matrix(announcements, items, overlap=overlap)
+
+
+def calculate_available_rations_per_item_per_day(announcements, items, overlap="overwrite"):
+	return build_even_matrix(announcements, items, overlap=overlap)
+
+def calculate_available_rations_runs_per_item(announcements, items, overlap="overwrite"):
+	return build_even_runs(announcements, items, overlap=overlap)
+
+def calculate_available_calories_per_item_per_day(item_to_date_to_amount, item_to_calories):
+	# Works on RationMatrix and RationRuns timelines alike.
+	item_to_calories_per_gram = {item: kcals_per_100g / 100.0 for item, kcals_per_100g in item_to_calories.items()}
+	return item_to_date_to_amount.scale(item_to_calories_per_gram)
+
+
+def calculate_total_amount_per_announcement(item_to_date_to_amount):
+	return item_to_date_to_amount.total()
+
+
+def calculate_total_calories_per_announcement(item_to_date_to_calories):
+	return item_to_date_to_calories.total()
+
+
+def calculate_total_amount_available_over_time(item_to_date_to_amount):
+	return item_to_date_to_amount.total()
+
+
+def calculate_total_calories_available_over_time(item_to_date_to_calories):
+	return item_to_date_to_calories.total()
+
+
+def calculate_total_available_over_time_with_clairvoyance(total_by_date, lookahead_window=7, precision=None):
+	return redistribute_with_clairvoyance(total_by_date, lookahead_window, precision)
+
+
+def calculate_number_of_days_without_food(total_by_date):
+	return int(np.count_nonzero(total_by_date == 0))
+
+
+def calculate_streaks_without_food(total_by_date, calendar=CALENDAR):
+	# The stretches of consecutive days without food, with their number, the longest one and when each began.
+	return Streaks.without_food(total_by_date, calendar)
@@ -0,0 +1,22 @@
+# The lookahead windows (in days) offered for the ration-stretching strategy.
+LOOKAHEAD_WINDOWS = (7, 14, 30)
+UNITS = ("mass", "calories")
+
+
+class StrategySeries:
+	# Every daily total the strategy views can show, computed once and stacked into a single (series, days) array.
+	# Keys are (unit, strategy, window) tuples, e.g. ("calories", "clairvoyant", 14); the even strategy has no window and
+	# uses None.
+	def __init__(self, keys, values):
+		self.keys = [tuple(key) for key in keys]
+		self.values = values
+		self._rows = {key: row for row, key in enumerate(self.keys)}
+
+	def __contains__(self, key):
+		return tuple(key) in self._rows
+
+	def get(self, unit, strategy, window=None):
+		if strategy == "even":
+			window = None
+		return self.values[self._rows[(unit, strategy, window)]]
+
@@ -0,0 +1,66 @@
+import numpy as np
+
+from rations.axes import CALENDAR, ItemAxis
+from rations.matrix import RationMatrix, accumulate_runs, announcement_runs
+
+
+class RationRuns:
+	# A ration timeline stored as runs instead of days. Run i says that items.items[columns[i]] was available at `rates[i]`
+	# per day on the calendar days [starts[i], ends[i]). Where runs of the same item overlap their rates add up. Rations are
+	# piecewise constant and most item-days are zero, so this takes a handful of runs per announcement where a
+	# RationMatrix takes a value per item per day, and the calendar can grow without the memory growing with it.
+	def __init__(self, columns, starts, ends, rates, items, calendar=CALENDAR):
+		self.columns = np.asarray(columns, dtype=np.int32)
+		self.starts = np.asarray(starts, dtype=np.int32)
+		self.ends = np.asarray(ends, dtype=np.int32)
+		self.rates = np.asarray(rates, dtype=np.float64)
+		self.items = items
+		self.calendar = calendar
+
+	def __len__(self):
+		return len(self.rates)
+
+	def column(self, item):
+		in_column = self.columns == self.items.position(item)
+		return _expand(self.starts[in_column], self.ends[in_column], self.rates[in_column], len(self.calendar))
+
+	def total(self):
+		return _expand(self.starts, self.ends, self.rates, len(self.calendar))
+
+	def select(self, items):
+		items = [item for item in items if item in self.items]
+		new_columns = np.full(len(self.items), -1, dtype=np.int32)
+		for column, item in enumerate(items):
+			new_columns[self.items.position(item)] = column
+		columns = new_columns[self.columns]
+		kept = columns >= 0
+		return RationRuns(columns[kept], self.starts[kept], self.ends[kept], self.rates[kept], ItemAxis(items), self.calendar)
+
+	def scale(self, item_to_factor):
+		# Multiplies each item's rates by its factor. Items without a factor are dropped.
+		scaled = self.select(item_to_factor.keys())
+		factors = np.array([item_to_factor[item] for item in scaled.items], dtype=np.float64)
+		scaled.rates = scaled.rates * factors[scaled.columns]
+		return scaled
+
+	def group_by(self, item_to_group):
+		# Relabels each run with its item's group, so the runs of a group's items add up. Items without a group are dropped.
+		grouped = self.select(item_to_group.keys())
+		groups = ItemAxis(sorted(set(item_to_group[item] for item in grouped.items)))
+		group_of_column = np.array([groups.position(item_to_group[item]) for item in grouped.items], dtype=np.int32)
+		return RationRuns(group_of_column[grouped.columns], grouped.starts, grouped.ends, grouped.rates, groups, self.calendar)
+
+	def to_matrix(self):
+		# Expands the runs into a day-by-item RationMatrix.
+		values = accumulate_runs(self.columns, self.starts, self.ends, self.rates, len(self.calendar), len(self.items))
+		return RationMatrix(values, self.items, self.calendar)
+
+
+def build_even_runs(announcements, items, calendar=CALENDAR, overlap="overwrite"):
+	# The runs equivalent of build_even_matrix, with the same `overlap` options.
+	return RationRuns(*announcement_runs(announcements, items, calendar, overlap), items, calendar)
+
+
+def _expand(starts, ends, rates, days):
+	# The daily sum of the given runs, as an array over `days` days.
+	return accumulate_runs(np.zeros(len(starts), dtype=np.int32), starts, ends, rates, days, 1)[:, 0]
@@ -0,0 +1,111 @@
+import functools
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from rations.axes import CALENDAR
+from rations.cache import CACHE_DIRECTORY, _source_digest
+from rations.matrix_file import read_matrix_file, write_matrix_file
+from rations.pipeline import calculate_items, calculate_total
+from rations.precompute import LOOKAHEAD_WINDOWS, UNITS, StrategySeries
+
+
+# The timelines of a snapshot written once as files that every process on the host maps read-only, so several
+# app servers share one copy of them in the page cache instead of each unpickling its own, and a new server starts
+# without calculating anything:
+#
+# 	shared/<fingerprint>-<overlap>-<code digest>/manifest.json             the series keys
+# 	shared/<fingerprint>-<overlap>-<code digest>/totals.npy                the daily totals, one row per series key
+# 	shared/<fingerprint>-<overlap>-<code digest>/<unit>-<strategy>.matrix  the announced and even day-by-item matrices,
+# 	                                                                       in the format of rations/matrix_file.py
+#
+# Everything is float64, like the calculations' own results, so a server reading the published files shows exactly what
+# one calculating for itself would.
+#
+# `python -m rations.warmup` publishes them; the engine reads from them whenever they exist.
+SHARED_DIRECTORY = os.environ.get("RATIONS_SHARED_DIR", os.path.join(CACHE_DIRECTORY, "shared"))
+
+ITEM_STRATEGIES = ("announced", "even")
+
+
+class SharedTimelines:
+	# A published set of timelines, mapped read-only. The arrays it hands out are views of the files, so they must not
+	# be written to (NumPy refuses).
+	def __init__(self, path, calendar=CALENDAR):
+		with open(os.path.join(path, "manifest.json")) as file:
+			manifest = json.load(file)
+		keys = [tuple(key) for key in manifest["totals"]]
+		self.totals = StrategySeries(keys, np.asarray(np.load(os.path.join(path, "totals.npy"), mmap_mode="r")))
+		self.calendar = calendar
+		self._items = {
+			(unit, strategy): read_matrix_file(os.path.join(path, f"{unit}-{strategy}.matrix"))
+			for unit in UNITS
+			for strategy in ITEM_STRATEGIES
+		}
+
+	def total(self, unit, strategy, window=None):
+		# The daily totals, or None for a series that wasn't published (a clairvoyant window outside those published).
+		key = (unit, strategy, window if strategy == "clairvoyant" else None)
+		if key not in self.totals:
+			return None
+		return self.totals.get(*key)
+
+	def items(self, unit, strategy):
+		return self._items[(unit, strategy)]
+
+
+def shared_path(fingerprint, overlap="overwrite", directory=SHARED_DIRECTORY):
+	# Keyed by the code as well as the data, like the result cache, so editing the calculations publishes anew.
+	return os.path.join(directory, f"{fingerprint}-{overlap}-{_package_digest()[:12]}")
+
+
+def publish_timelines(fingerprint, overlap="overwrite", windows=LOOKAHEAD_WINDOWS, directory=SHARED_DIRECTORY):
+	# Writes the timelines of the snapshot into a scratch directory and renames it into place, so readers never map a
+	# half-written set, and returns its path. Does nothing if the set was already published.
+	target = shared_path(fingerprint, overlap, directory)
+	if os.path.exists(os.path.join(target, "manifest.json")):
+		return target
+
+	keys = [(unit, strategy, None) for unit in UNITS for strategy in ITEM_STRATEGIES]
+	keys.extend((unit, "clairvoyant", window) for unit in UNITS for window in windows)
+	os.makedirs(directory, exist_ok=True)
+	scratch = tempfile.mkdtemp(dir=directory, prefix=".publishing-")
+	try:
+		np.save(os.path.join(scratch, "totals.npy"), np.vstack([calculate_total(fingerprint, overlap, *key) for key in keys]))
+		for unit in UNITS:
+			for strategy in ITEM_STRATEGIES:
+				matrix = calculate_items(fingerprint, overlap, unit, strategy)
+				write_matrix_file(os.path.join(scratch, f"{unit}-{strategy}.matrix"), matrix, np.float64)
+		# The manifest goes last: a directory with one is complete.
+		with open(os.path.join(scratch, "manifest.json"), "w") as file:
+			json.dump({"totals": keys}, file)
+		try:
+			os.rename(scratch, target)
+		except OSError:
+			# Another process published the same set first.
+			if not os.path.exists(os.path.join(target, "manifest.json")):
+				raise
+	finally:
+		shutil.rmtree(scratch, ignore_errors=True)
+	return target
+
+
+def open_timelines(fingerprint, overlap="overwrite", directory=SHARED_DIRECTORY):
+	# The published timelines of the snapshot, mapped once per process, or None if they haven't been published.
+	path = shared_path(fingerprint, overlap, directory)
+	if not os.path.exists(os.path.join(path, "manifest.json")):
+		return None
+	return _map(path)
+
+
+@functools.lru_cache(maxsize=8)
+def _map(path):
+	return SharedTimelines(path)
+
+
+@functools.lru_cache(maxsize=1)
+def _package_digest():
+	return _source_digest(None)
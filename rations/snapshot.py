@@ -0,0 +1,161 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from rations.sources import AIRTABLE_API_URL, TABLE_NAMES, fetch_tables
+
+
+SNAPSHOT_DIRECTORY = os.environ.get("RATIONS_SNAPSHOT_DIR", "snapshots")
+
+# Bumped whenever the layout of the snapshot files changes. Files written by another version are re-synced from scratch.
+SCHEMA_VERSION = 2
+
+# Records modified on Airtable's side shortly before a sync started may not be visible to it yet, so every incremental
+# sync looks a little further back than the previous one finished.
+SYNC_OVERLAP = timedelta(minutes=5)
+
+
+class SnapshotStore:
+	# A local copy of the Airtable tables, one SQLite file per table, so the app reads its data from disk instead of
+	# paging through the Airtable API on startup.
+	def __init__(self, directory=SNAPSHOT_DIRECTORY):
+		self.directory = directory
+
+	def path(self, table_name):
+		slug = re.sub(r"[^a-z0-9]+", "_", table_name.lower()).strip("_")
+		return os.path.join(self.directory, f"{slug}.sqlite")
+
+	def exists(self, table_name):
+		if not os.path.exists(self.path(table_name)):
+			return False
+		with self._connect(table_name) as connection:
+			return self._schema_version(connection) == SCHEMA_VERSION
+
+	def read(self, table_name):
+		with self._connect(table_name) as connection:
+			rows = connection.execute("SELECT id, created_time, fields FROM records ORDER BY rowid").fetchall()
+		return [
+			{"id": record_id, "createdTime": created_time, "fields": json.loads(fields)}
+			for record_id, created_time, fields in rows
+		]
+
+	def last_synced(self, table_name):
+		if not self.exists(table_name):
+			return None
+		with self._connect(table_name) as connection:
+			row = connection.execute("SELECT value FROM meta WHERE key = 'last_synced'").fetchone()
+		return row[0] if row else None
+
+	def fingerprint(self, table_names=TABLE_NAMES):
+		# A short digest that changes whenever the content of any of the tables does. It is computed once per sync, so
+		# reading it costs a lookup per table no matter how many records there are.
+		digest = hashlib.sha1()
+		for table_name in table_names:
+			with self._connect(table_name) as connection:
+				row = connection.execute("SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+			digest.update(f"{table_name}:{row[0] if row else ''};".encode("utf-8"))
+		return digest.hexdigest()
+
+	def sync(self, table_name, full=False, api_url=AIRTABLE_API_URL):
+		return self.sync_all([table_name], full, api_url)[table_name]
+
+	def sync_all(self, table_names=TABLE_NAMES, full=False, api_url=AIRTABLE_API_URL):
+		# Fetches the records modified since the last sync (or all of them the first time, or when `full` is set) and
+		# writes them into the snapshot. A full sync also drops records that were deleted from Airtable. The tables are
+		# fetched concurrently. Returns the number of records fetched per table.
+		started = datetime.utcnow()
+		last_synced = {table_name: None if full else self.last_synced(table_name) for table_name in table_names}
+		formulas = {
+			table_name: f"IS_AFTER(LAST_MODIFIED_TIME(), '{last_synced[table_name]}')"
+			for table_name in table_names
+			if last_synced[table_name]
+		}
+		table_to_records = fetch_tables(table_names, formulas, api_url)
+
+		os.makedirs(self.directory, exist_ok=True)
+		for table_name, records in table_to_records.items():
+			self._write(table_name, records, started, replace=last_synced[table_name] is None)
+		return {table_name: len(records) for table_name, records in table_to_records.items()}
+
+	def _write(self, table_name, records, started, replace):
+		with self._connect(table_name) as connection:
+			if replace:
+				connection.executescript("DROP TABLE IF EXISTS records; DROP TABLE IF EXISTS meta;")
+			self._create_tables(connection)
+			connection.executemany(
+				"INSERT OR REPLACE INTO records (id, created_time, fields) VALUES (?, ?, ?)",
+				[(record["id"], record.get("createdTime"), json.dumps(record["fields"])) for record in records],
+			)
+			connection.execute(
+				"INSERT OR REPLACE INTO meta (key, value) VALUES ('last_synced', ?)",
+				((started - SYNC_OVERLAP).strftime("%Y-%m-%dT%H:%M:%S.000Z"),),
+			)
+			connection.execute(
+				"INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)",
+				(self._content_digest(connection),),
+			)
+			connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+	def _content_digest(self, connection):
+		digest = hashlib.sha1()
+		for record_id, fields in connection.execute("SELECT id, fields FROM records ORDER BY id"):
+			digest.update(f"{record_id}\0{fields}\0".encode("utf-8"))
+		return digest.hexdigest()
+
+	@contextmanager
+	def _connect(self, table_name):
+		# Commits on success, rolls back on error, and always closes the file.
+		connection = sqlite3.connect(self.path(table_name))
+		try:
+			with connection:
+				yield connection
+		finally:
+			connection.close()
+
+	def _schema_version(self, connection):
+		return connection.execute("PRAGMA user_version").fetchone()[0]
+
+	def _create_tables(self, connection):
+		connection.execute("CREATE TABLE IF NOT EXISTS records (id TEXT PRIMARY KEY, created_time TEXT, fields TEXT NOT NULL)")
+		connection.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+
+def load_tables(table_names=TABLE_NAMES, store=None):
+	# Reads tables from the local snapshot. Only the very first load on a fresh machine has to go to Airtable, and then
+	# all the missing tables are fetched together.
+	store = _synced_store(table_names, store)
+	return [store.read(table_name) for table_name in table_names]
+
+
+def snapshot_fingerprint(table_names=TABLE_NAMES, store=None):
+	return _synced_store(table_names, store).fingerprint(table_names)
+
+
+def _synced_store(table_names, store):
+	store = store or SnapshotStore()
+	missing = [table_name for table_name in table_names if not store.exists(table_name)]
+	if missing:
+		store.sync_all(missing)
+	return store
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Sync the local snapshot of the Airtable tables.")
+	parser.add_argument("--full", action="store_true", help="re-fetch every record instead of only the modified ones")
+	parser.add_argument("--directory", default=SNAPSHOT_DIRECTORY, help="where the snapshot files live")
+	parser.add_argument("--api-url", default=AIRTABLE_API_URL, help="Airtable API root, e.g. a local fake")
+	arguments = parser.parse_args()
+
+	store = SnapshotStore(arguments.directory)
+	table_to_fetched = store.sync_all(TABLE_NAMES, full=arguments.full, api_url=arguments.api_url)
+	for table_name, fetched in table_to_fetched.items():
+		print(f"{table_name}: {fetched} records fetched, snapshot at {store.path(table_name)}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,61 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+AIRTABLE_API_URL = "https://api.airtable.com/v0"
+AIRTABLE_API_KEY = "keygCUTG6e5DvySOR"
+AIRTABLE_BASE_ID = "appXanlsMeENo7O1N"
+
+RATIONS_TABLE_NAME = "Ration Announcements"
+CALORIC_VALUES_TABLE_NAME = "Caloric Value"
+TABLE_NAMES = (RATIONS_TABLE_NAME, CALORIC_VALUES_TABLE_NAME)
+
+# Airtable returns at most 100 records per page and answers 429 when a base gets more than 5 requests per second, after
+# which it wants clients to back off for 30 seconds.
+PAGE_SIZE = 100
+RATE_LIMITED_BACKOFF_SECONDS = 30
+
+
+def fetch_records(table_name, formula=None, session=None, api_url=AIRTABLE_API_URL):
+	# Returns every record of an Airtable table (or those matching `formula`) in the API's
+	# {"id": ..., "createdTime": ..., "fields": {...}} shape.
+	session = session or requests.Session()
+	url = f"{api_url}/{AIRTABLE_BASE_ID}/{quote(table_name, safe='')}"
+	headers = {"Authorization": f"Bearer {AIRTABLE_API_KEY}"}
+	params = {"pageSize": PAGE_SIZE}
+	if formula:
+		params["filterByFormula"] = formula
+
+	records = []
+	while True:
+		response = session.get(url, params=params, headers=headers, timeout=30)
+		if response.status_code == 429:
+			time.sleep(RATE_LIMITED_BACKOFF_SECONDS)
+			continue
+		response.raise_for_status()
+		page = response.json()
+		records.extend(page["records"])
+		if "offset" not in page:
+			return records
+		params["offset"] = page["offset"]
+
+
+def fetch_tables(table_names=TABLE_NAMES, formulas=None, api_url=AIRTABLE_API_URL):
+	# Fetches several tables at once, one thread per table over a shared connection pool. Airtable's page offsets are
+	# opaque, so the pages of a single table still have to be requested one after another.
+	formulas = formulas or {}
+	session = requests.Session()
+	workers = max(len(table_names), 1)
+	adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+	session.mount("http://", adapter)
+	session.mount("https://", adapter)
+	with session, ThreadPoolExecutor(max_workers=workers) as executor:
+		futures = {
+			table_name: executor.submit(fetch_records, table_name, formulas.get(table_name), session, api_url)
+			for table_name in table_names
+		}
+		return {table_name: future.result() for table_name, future in futures.items()}
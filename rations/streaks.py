@@ -0,0 +1,106 @@
+import numpy as np
+import pandas
+
+from rations.axes import CALENDAR
+
+
+class Streaks:
+	# The stretches of consecutive days on which a daily total was zero: stretch i covers the calendar days
+	# [starts[i], ends[i]). Found with one comparison and one diff over the whole timeline.
+	def __init__(self, starts, ends, calendar=CALENDAR):
+		self.starts = starts
+		self.ends = ends
+		self.calendar = calendar
+
+	@classmethod
+	def without_food(cls, total_by_date, calendar=CALENDAR):
+		empty = np.zeros(len(total_by_date) + 2, dtype=np.int8)
+		empty[1:-1] = np.asarray(total_by_date) == 0
+		edges = np.flatnonzero(np.diff(empty))
+		return cls(edges[::2], edges[1::2], calendar)
+
+	def __len__(self):
+		return len(self.starts)
+
+	@property
+	def lengths(self):
+		return self.ends - self.starts
+
+	@property
+	def days(self):
+		return int(self.lengths.sum())
+
+	@property
+	def longest(self):
+		return int(self.lengths.max()) if len(self) else 0
+
+	@property
+	def start_dates(self):
+		return self.calendar.dates[self.starts]
+
+	def longest_start_date(self):
+		# The first day of the longest stretch (the earliest, if several are as long), or None without any.
+		return self.calendar.date(int(self.starts[np.argmax(self.lengths)])) if len(self) else None
+
+
+class GapIndex(Streaks):
+	# The stretches without food of one timeline with the announcement that preceded each, indexed so that "the gaps
+	# longer than N days between two dates" is two bisections and a walk down a range-maximum table, O(log n) plus one
+	# step per gap found, instead of a scan over the timeline.
+	def __init__(self, starts, ends, preceding, calendar=CALENDAR):
+		super().__init__(starts, ends, calendar)
+		self.preceding = preceding
+		# _maxima[k][i] is the position of the longest of the gaps i .. i + 2**k - 1.
+		lengths = self.lengths
+		self._maxima = [np.arange(len(lengths))]
+		width = 1
+		while 2 * width <= len(lengths):
+			left, right = self._maxima[-1][:-width], self._maxima[-1][width:]
+			self._maxima.append(np.where(lengths[right] > lengths[left], right, left))
+			width *= 2
+
+	@classmethod
+	def without_food(cls, total_by_date, announcements, calendar=CALENDAR):
+		# `announcements` maps announcement dates to their info, as calculate_inputs gives them; a gap's preceding
+		# announcement is the last to take effect before the gap began, or None for a gap before any.
+		streaks = Streaks.without_food(total_by_date, calendar)
+		names = sorted(announcements, key=lambda name: calendar.offset(announcements[name]["start_date"]))
+		days = np.array([calendar.offset(announcements[name]["start_date"]) for name in names], dtype=np.int64)
+		positions = np.searchsorted(days, streaks.starts, side="left") - 1
+		preceding = tuple(names[position] if position >= 0 else None for position in positions.tolist())
+		return cls(streaks.starts, streaks.ends, preceding, calendar)
+
+	def between(self, first=None, last=None, longer_than=0):
+		# The positions, in date order, of the gaps of more than `longer_than` days that overlap the dates from `first`
+		# to `last` (both included, either None for the end of the calendar).
+		low = 0 if first is None else int(np.searchsorted(self.ends, self.calendar.offset(first), side="right"))
+		high = len(self) if last is None else int(np.searchsorted(self.starts, self.calendar.offset(last), side="right"))
+		lengths = self.lengths
+		found = []
+		ranges = [(low, high)]
+		while ranges:
+			low, high = ranges.pop()
+			if low >= high:
+				continue
+			longest = self._longest(low, high, lengths)
+			if lengths[longest] <= longer_than:
+				continue
+			found.append(longest)
+			ranges.extend(((low, longest), (longest + 1, high)))
+		return np.array(sorted(found), dtype=np.int64)
+
+	def table(self, positions=None):
+		# The gaps (all, or those at `positions`) as a frame with their first and last day, length and preceding
+		# announcement.
+		positions = np.arange(len(self)) if positions is None else positions
+		return pandas.DataFrame({
+			"first day": self.calendar.dates[self.starts[positions]],
+			"last day": self.calendar.dates[self.ends[positions] - 1],
+			"days": self.lengths[positions],
+			"preceding announcement": [self.preceding[position] for position in positions.tolist()],
+		})
+
+	def _longest(self, low, high, lengths):
+		level = (high - low).bit_length() - 1
+		left, right = self._maxima[level][low], self._maxima[level][high - (1 << level)]
+		return int(right if lengths[right] > lengths[left] else left)
@@ -0,0 +1,84 @@
+import argparse
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas
+
+from rations.clairvoyance import redistribute_with_clairvoyance
+from rations.matrix import OVERLAPS
+from rations.streaks import Streaks
+
+
+# The lookahead windows (in days) a sweep compares by default, far beyond the few the app's dropdown offers.
+SWEEP_WINDOWS = tuple(range(1, 121))
+
+# One row per window: how many days went without food, in how many stretches and how long the longest was, and the
+# mean and variance of the amount available each day once it has been stretched.
+SWEEP_COLUMNS = ("window", "days_without_food", "stretches", "longest_stretch", "mean", "variance")
+
+# The daily totals every window of a sweep stretches, handed to each worker process once, when it starts, instead of
+# with each window.
+_shared_total_by_day = None
+
+
+def sweep_windows(total_by_day, windows=SWEEP_WINDOWS, workers=None):
+	# Runs the clairvoyant redistribution of `total_by_day` (the even strategy's totals) once per window, spread over
+	# `workers` processes (one per core by default), and returns the SWEEP_COLUMNS as a frame ordered by window.
+	total_by_day = np.array(total_by_day, dtype=np.float64)
+	windows = list(windows)
+	workers = min(workers or os.cpu_count() or 1, len(windows))
+	if workers <= 1:
+		rows = [_window_row(total_by_day, window) for window in windows]
+	else:
+		# Windows are handed out in chunks, a few per worker, so that the long windows at the end don't all land on one.
+		# The workers are spawned rather than forked: a sweep asked for from the app would otherwise fork the Streamlit
+		# server, threads, locks and all.
+		chunksize = max(1, len(windows) // (4 * workers))
+		context = multiprocessing.get_context("spawn")
+		with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_share, initargs=(total_by_day,)) as executor:
+			rows = list(executor.map(_sweep_window, windows, chunksize=chunksize))
+	return pandas.DataFrame(rows, columns=SWEEP_COLUMNS)
+
+
+def _share(total_by_day):
+	global _shared_total_by_day
+	total_by_day.flags.writeable = False
+	_shared_total_by_day = total_by_day
+
+
+def _sweep_window(window):
+	return _window_row(_shared_total_by_day, window)
+
+
+def _window_row(total_by_day, window):
+	# redistribute_with_clairvoyance works on its own copy, so the shared totals are only ever read.
+	stretched = redistribute_with_clairvoyance(total_by_day, window)
+	streaks = Streaks.without_food(stretched)
+	return window, streaks.days, len(streaks), streaks.longest, float(stretched.mean()), float(stretched.var())
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Compare the ration-stretching strategy across many lookahead windows.")
+	parser.add_argument("output", nargs="?", help="CSV file to write the results to (default: print them)")
+	parser.add_argument("--unit", choices=("mass", "calories"), default="calories")
+	parser.add_argument("--first", type=int, default=SWEEP_WINDOWS[0], help="shortest window, in days")
+	parser.add_argument("--last", type=int, default=SWEEP_WINDOWS[-1], help="longest window, in days")
+	parser.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+	parser.add_argument("--overlap", choices=OVERLAPS, default="overwrite", help="how overlapping announcements combine")
+	arguments = parser.parse_args()
+
+	from rations.engine import load
+
+	even_total = load(overlap=arguments.overlap).timeline(arguments.unit, "even")
+	results = sweep_windows(even_total, range(arguments.first, arguments.last + 1), arguments.workers)
+	if arguments.output:
+		results.to_csv(arguments.output, index=False)
+		print(f"Swept {len(results)} windows into {arguments.output}")
+	else:
+		print(results.to_string(index=False))
+
+
+if __name__ == "__main__":
+	main()
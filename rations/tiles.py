@@ -0,0 +1,190 @@
+import argparse
+import functools
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+from http import HTTPStatus
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+
+# The Kitchens tab's map, cut once into a pyramid of WebP tiles and a resized preview:
+#
+# 	tiles/<digest>/manifest.json        size of the image and number of zoom levels
+# 	tiles/<digest>/preview.webp         what the tab shows by default
+# 	tiles/<digest>/<z>/<x>_<y>.webp     TILE_SIZE square tiles; level 0 fits in one tile, the last level is full size
+#
+# <digest> is a hash of the source image, so a changed map gets a new directory and everything under one can be cached
+# by browsers forever. `python -m rations.tiles build` makes the pyramid and `python -m rations.tiles serve` serves it.
+KITCHENS_MAP_PATH = "lodz_ghetto_kitchens.png"
+TILE_DIRECTORY = os.environ.get("RATIONS_TILE_DIR", "tiles")
+TILE_SIZE = 256
+PREVIEW_WIDTH = 1024
+WEBP_QUALITY = 80
+SERVE_PORT = 8600
+# The tile server is meant to sit behind a reverse proxy on the same host; pass --host 0.0.0.0 to expose it directly.
+SERVE_HOST = "127.0.0.1"
+
+# Where the app's visitors can reach `python -m rations.tiles serve`, e.g. https://tiles.example.org. Without it the
+# Kitchens tab shows the preview only.
+TILE_URL = os.environ.get("RATIONS_TILE_URL")
+
+# Every file served is immutable (see above), so browsers and proxies may keep it for a year without asking again.
+# Errors and redirects are not: a tile asked for before its pyramid was built is there the next time.
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+NO_CACHE_CONTROL = "no-store"
+
+
+def image_digest(path=KITCHENS_MAP_PATH):
+	stat = os.stat(path)
+	return _image_digest(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=4)
+def _image_digest(path, modified, size):
+	digest = hashlib.sha1()
+	with open(path, "rb") as file:
+		for chunk in iter(lambda: file.read(1024 * 1024), b""):
+			digest.update(chunk)
+	return digest.hexdigest()[:16]
+
+
+def pyramid_directory(path=KITCHENS_MAP_PATH, directory=TILE_DIRECTORY):
+	return os.path.join(directory, image_digest(path))
+
+
+def ensure_pyramid(path=KITCHENS_MAP_PATH, directory=TILE_DIRECTORY):
+	# Returns the manifest of the image's pyramid, building the pyramid first if it doesn't exist yet.
+	target = pyramid_directory(path, directory)
+	manifest_path = os.path.join(target, "manifest.json")
+	if not os.path.exists(manifest_path):
+		build_pyramid(path, target)
+	with open(manifest_path) as file:
+		return json.load(file)
+
+
+def build_pyramid(path, target):
+	# Renders the pyramid into a scratch directory next to `target` and renames it into place, so a half-built pyramid
+	# is never visible and two processes building at the same time don't trip over each other.
+	from PIL import Image
+
+	image = Image.open(path).convert("RGBA")
+	width, height = image.size
+	levels = max(0, math.ceil(math.log2(max(width, height) / TILE_SIZE))) + 1
+
+	os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+	scratch = tempfile.mkdtemp(dir=os.path.dirname(target) or ".", prefix=".building-")
+	try:
+		for level in range(levels):
+			scale = 2 ** (level - levels + 1)
+			level_image = image.resize((max(1, math.ceil(width * scale)), max(1, math.ceil(height * scale))), Image.LANCZOS)
+			os.makedirs(os.path.join(scratch, str(level)))
+			for x in range(math.ceil(level_image.width / TILE_SIZE)):
+				for y in range(math.ceil(level_image.height / TILE_SIZE)):
+					# Edge tiles are padded with transparency to the full tile size, which map viewers expect.
+					tile = level_image.crop((x * TILE_SIZE, y * TILE_SIZE, (x + 1) * TILE_SIZE, (y + 1) * TILE_SIZE))
+					tile.save(os.path.join(scratch, str(level), f"{x}_{y}.webp"), "WEBP", quality=WEBP_QUALITY)
+
+		preview = image.copy()
+		preview.thumbnail((PREVIEW_WIDTH, PREVIEW_WIDTH * height // width), Image.LANCZOS)
+		preview.save(os.path.join(scratch, "preview.webp"), "WEBP", quality=WEBP_QUALITY)
+
+		with open(os.path.join(scratch, "manifest.json"), "w") as file:
+			json.dump({"width": width, "height": height, "tile_size": TILE_SIZE, "levels": levels}, file)
+		try:
+			os.rename(scratch, target)
+		except OSError:
+			# Somebody else finished first; theirs is the same pyramid.
+			if not os.path.exists(os.path.join(target, "manifest.json")):
+				raise
+	finally:
+		shutil.rmtree(scratch, ignore_errors=True)
+
+
+def read_preview(path=KITCHENS_MAP_PATH, directory=TILE_DIRECTORY):
+	# The preview's bytes, read once per pyramid.
+	ensure_pyramid(path, directory)
+	return _read_file(os.path.join(pyramid_directory(path, directory), "preview.webp"))
+
+
+@functools.lru_cache(maxsize=4)
+def _read_file(path):
+	with open(path, "rb") as file:
+		return file.read()
+
+
+def viewer_html(manifest, base_url, height=600):
+	# A Leaflet viewer over the pyramid served at `base_url` (the URL of its <digest> directory). Tiles are fetched as
+	# they come into view, so a phone looking at the whole map downloads a tile or two.
+	last_level = manifest["levels"] - 1
+	return f"""
+		<link rel="stylesheet" href="https://unpkg.com/leaflet@1.7.1/dist/leaflet.css">
+		<script src="https://unpkg.com/leaflet@1.7.1/dist/leaflet.js"></script>
+		<div id="kitchens-map" style="height: {height}px; background: white;"></div>
+		<script>
+			var map = L.map("kitchens-map", {{crs: L.CRS.Simple, minZoom: 0, maxZoom: {last_level}}});
+			var bounds = L.latLngBounds(
+				map.unproject([0, {manifest["height"]}], {last_level}),
+				map.unproject([{manifest["width"]}, 0], {last_level})
+			);
+			L.tileLayer("{base_url.rstrip("/")}/{{z}}/{{x}}_{{y}}.webp", {{
+				tileSize: {manifest["tile_size"]},
+				bounds: bounds,
+				noWrap: true,
+				maxNativeZoom: {last_level}
+			}}).addTo(map);
+			map.fitBounds(bounds);
+			map.setMaxBounds(bounds.pad(0.1));
+		</script>
+	"""
+
+
+class TileRequestHandler(SimpleHTTPRequestHandler):
+	# Serves the tile files with long-lived caching headers, to pages on any origin (the app's, typically). Directories
+	# aren't listed.
+	extensions_map = dict(SimpleHTTPRequestHandler.extensions_map, **{".webp": "image/webp", ".json": "application/json"})
+	_status = None
+
+	def send_response(self, code, message=None):
+		self._status = code
+		super().send_response(code, message)
+
+	def end_headers(self):
+		self.send_header("Cache-Control", CACHE_CONTROL if self._status == HTTPStatus.OK else NO_CACHE_CONTROL)
+		self.send_header("Access-Control-Allow-Origin", "*")
+		super().end_headers()
+
+	def list_directory(self, path):
+		self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+		return None
+
+	def log_message(self, format, *args):
+		pass
+
+
+def serve(directory=TILE_DIRECTORY, port=SERVE_PORT, host=SERVE_HOST):
+	handler = functools.partial(TileRequestHandler, directory=directory)
+	server = ThreadingHTTPServer((host, port), handler)
+	print(f"Serving {directory} at http://{host}:{port}/")
+	server.serve_forever()
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Build and serve the tile pyramid of the Kitchens map.")
+	parser.add_argument("command", choices=["build", "serve"])
+	parser.add_argument("--image", default=KITCHENS_MAP_PATH, help="the map to cut into tiles")
+	parser.add_argument("--directory", default=TILE_DIRECTORY, help="where the pyramids live")
+	parser.add_argument("--port", type=int, default=SERVE_PORT, help="port to serve on")
+	parser.add_argument("--host", default=SERVE_HOST, help="address to serve on (default: this host only)")
+	arguments = parser.parse_args()
+
+	manifest = ensure_pyramid(arguments.image, arguments.directory)
+	print(f"Pyramid of {arguments.image} ({manifest['levels']} levels) at {pyramid_directory(arguments.image, arguments.directory)}")
+	if arguments.command == "serve":
+		serve(arguments.directory, arguments.port, arguments.host)
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,107 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from rations.cache import CACHE_DIRECTORY
+from rations.engine import STRATEGIES, UNITS, Rations
+from rations.matrix import OVERLAPS
+from rations.precompute import LOOKAHEAD_WINDOWS
+from rations.shared import _package_digest, publish_timelines
+from rations.snapshot import SnapshotStore, snapshot_fingerprint
+from rations.sources import TABLE_NAMES
+from rations.tiles import KITCHENS_MAP_PATH, ensure_pyramid
+
+
+# Written once everything the app can show has been calculated for the current snapshot, holding that snapshot's
+# fingerprint and a digest of the code that calculated it (results are cached by both). A server is ready to take
+# traffic when the file names the snapshot it will read and the code it runs, so a deployment runs
+# `python -m rations.warmup` before starting Streamlit and probes readiness with `python -m rations.warmup --check`.
+READY_PATH = os.environ.get("RATIONS_READY_FILE", os.path.join(CACHE_DIRECTORY, "ready.json"))
+
+
+def warm_up(fingerprint=None, overlaps=("overwrite",), windows=LOOKAHEAD_WINDOWS):
+	# Calculates every unit, strategy and lookahead window the app offers, so each lands in the result cache (see
+	# rations/cache.py) and the first visitor to ask for it gets a lookup, and publishes the timelines for every process
+	# on the host to map (see rations/shared.py). Returns the snapshot's fingerprint.
+	fingerprint = fingerprint or snapshot_fingerprint()
+	for overlap in overlaps:
+		rations = Rations(fingerprint, overlap)
+		for unit in UNITS:
+			for strategy in STRATEGIES:
+				if strategy == "clairvoyant":
+					for window in windows:
+						rations.gaps_without_food(unit, strategy, window)
+				else:
+					rations.items(unit, strategy)
+					rations.gaps_without_food(unit, strategy)
+		# Published last, since it reads what was just calculated from the cache.
+		publish_timelines(fingerprint, overlap, windows)
+	return fingerprint
+
+
+def mark_ready(fingerprint, seconds, path=READY_PATH):
+	# Written to a scratch file and renamed into place, so a probe never reads half of it.
+	os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+	descriptor, scratch = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=".ready-")
+	with os.fdopen(descriptor, "w") as file:
+		json.dump({
+			"fingerprint": fingerprint,
+			"code": _package_digest(),
+			"warmed_at": time.time(),
+			"seconds": round(seconds, 3),
+		}, file)
+	os.replace(scratch, path)
+
+
+def mark_not_ready(path=READY_PATH):
+	try:
+		os.remove(path)
+	except FileNotFoundError:
+		pass
+
+
+def is_ready(path=READY_PATH, store=None):
+	# Whether the last warm-up was for the snapshot as it is now, by the code as it is now. Never syncs; a missing
+	# snapshot isn't ready.
+	store = store or SnapshotStore()
+	try:
+		with open(path) as file:
+			ready = json.load(file)
+		fingerprint, code = ready["fingerprint"], ready["code"]
+	except (OSError, ValueError, KeyError):
+		return False
+	if code != _package_digest():
+		return False
+	if not all(store.exists(table_name) for table_name in TABLE_NAMES):
+		return False
+	return fingerprint == store.fingerprint()
+
+
+def main():
+	parser = argparse.ArgumentParser(description="Calculate everything the app shows before it takes traffic.")
+	parser.add_argument("--sync", action="store_true", help="pull in records changed on Airtable first")
+	parser.add_argument("--overlap", choices=OVERLAPS, action="append", help="overlaps to warm up (default: overwrite)")
+	parser.add_argument("--ready-file", default=READY_PATH, help="where to signal readiness")
+	parser.add_argument("--check", action="store_true", help="only exit with 0 if the last warm-up is current, 1 otherwise")
+	arguments = parser.parse_args()
+
+	if arguments.check:
+		sys.exit(0 if is_ready(arguments.ready_file) else 1)
+
+	started = time.perf_counter()
+	mark_not_ready(arguments.ready_file)
+	if arguments.sync:
+		SnapshotStore().sync_all(TABLE_NAMES)
+	fingerprint = warm_up(overlaps=arguments.overlap or ("overwrite",))
+	if os.path.exists(KITCHENS_MAP_PATH):
+		ensure_pyramid()
+	seconds = time.perf_counter() - started
+	mark_ready(fingerprint, seconds, arguments.ready_file)
+	print(f"Warmed up snapshot {fingerprint} in {seconds:.1f}s, ready file at {arguments.ready_file}")
+
+
+if __name__ == "__main__":
+	main()
@@ -0,0 +1,39 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pytest
+
+
+# The tests sync, cache and publish into a scratch directory of their own instead of the checkout's. Set before any
+# test imports rations, which reads these when it is imported.
+_SCRATCH = tempfile.mkdtemp(prefix="rations-tests-")
+atexit.register(shutil.rmtree, _SCRATCH, True)
+for name in ("RATIONS_SNAPSHOT_DIR", "RATIONS_CACHE_DIR", "RATIONS_SHARED_DIR", "RATIONS_TILE_DIR"):
+	os.environ[name] = os.path.join(_SCRATCH, name[len("RATIONS_"):].lower())
+os.environ["RATIONS_READY_FILE"] = os.path.join(_SCRATCH, "ready.json")
+
+
+def random_timeline(days, seed=0):
+	# Daily totals with stretches without food of every length, a fraction of the days left empty at random.
+	random_numbers = np.random.default_rng(seed)
+	total_by_day = random_numbers.integers(1, 5000, days).astype(np.float64)
+	total_by_day[random_numbers.random(days) < 0.4] = 0
+	return total_by_day
+
+
+# The timelines the comparisons with brute-force versions run on: the edge cases, then one random timeline.
+TIMELINES = {
+	"empty": np.zeros(0),
+	"all zeros": np.zeros(40),
+	"no zeros": np.arange(1, 41, dtype=np.float64),
+	"zeros at both ends": np.array([0, 0, 9, 3, 0, 8, 0, 0, 2, 7, 5, 0, 0, 0], dtype=np.float64),
+	"random": random_timeline(300),
+}
+
+
+@pytest.fixture(params=list(TIMELINES))
+def timeline(request):
+	return TIMELINES[request.param].copy()
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+
+from rations.axes import ItemAxis
+from rations.cache import ResultCache
+from rations.matrix import RationMatrix
+
+
+CALLS = []
+
+
+def calculate(fingerprint, width):
+	CALLS.append(width)
+	return np.zeros(3), [RationMatrix.zeros(ItemAxis([f"Item {index}" for index in range(width)]))]
+
+
+def assert_read_only(result):
+	total, (matrix,) = result
+	with pytest.raises(ValueError):
+		total[0] = 1
+	with pytest.raises(ValueError):
+		matrix.values[0, 0] = 1
+
+
+def test_cached_arrays_are_read_only(tmp_path):
+	CALLS.clear()
+	memoized = ResultCache(str(tmp_path)).memoize(calculate)
+	assert_read_only(memoized("fingerprint", 2))
+	assert_read_only(memoized("fingerprint", 2))
+	# Read back from disk, as another process would.
+	assert_read_only(ResultCache(str(tmp_path)).memoize(calculate)("fingerprint", 2))
+	assert CALLS == [2]
+
+
+def test_a_result_evicted_while_read_is_still_returned(tmp_path, monkeypatch):
+	cache = ResultCache(str(tmp_path))
+	cache.put("key", np.arange(3))
+
+	def evicted(path):
+		raise FileNotFoundError(path)
+
+	monkeypatch.setattr("os.utime", evicted)
+	np.testing.assert_array_equal(ResultCache(str(tmp_path)).get("key"), np.arange(3))
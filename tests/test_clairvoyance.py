@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from rations.clairvoyance import redistribute_with_clairvoyance, redistribution_span
+
+
+def level_by_bisection(window, amount_given):
+	# The level L at which cutting every day of the window down to L gives up amount_given(L), found by bisection
+	# instead of by sorting.
+	low, high = 0.0, float(window.max())
+	for _ in range(200):
+		level = (low + high) / 2
+		if np.maximum(window - level, 0).sum() > amount_given(level):
+			low = level
+		else:
+			high = level
+	return high
+
+
+def brute_force(total_by_day, lookahead_window, precision=None):
+	# Each empty day, in order, takes food from the lookahead window before it until the two are level.
+	total_by_day = np.array(total_by_day, dtype=np.float64)
+	for day in range(len(total_by_day)):
+		if total_by_day[day] != 0:
+			continue
+		window = total_by_day[max(day - lookahead_window, 0):day]
+		if not window.size or window.max() <= 0:
+			continue
+		received = level_by_bisection(window, lambda level: level)
+		if precision is not None:
+			received = np.floor(received / precision) * precision
+			if received <= 0:
+				continue
+			donor_level = level_by_bisection(window, lambda level: received)
+		else:
+			donor_level = received
+		np.minimum(window, donor_level, out=window)
+		total_by_day[day] = received
+	return total_by_day
+
+
+LOOKAHEAD_WINDOWS = (0, 1, 7, 30)
+
+
+def test_matches_brute_force(timeline):
+	for lookahead_window in LOOKAHEAD_WINDOWS:
+		expected = brute_force(timeline, lookahead_window)
+		np.testing.assert_allclose(redistribute_with_clairvoyance(timeline, lookahead_window), expected, rtol=1e-9, atol=1e-6)
+
+
+def test_matches_brute_force_with_precision(timeline):
+	for lookahead_window in LOOKAHEAD_WINDOWS:
+		expected = brute_force(timeline, lookahead_window, precision=10)
+		actual = redistribute_with_clairvoyance(timeline, lookahead_window, precision=10)
+		np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-6)
+
+
+def test_keeps_the_total(timeline):
+	assert redistribute_with_clairvoyance(timeline, 14).sum() == pytest.approx(timeline.sum())
+
+
+def test_levels_a_single_empty_day():
+	np.testing.assert_allclose(redistribute_with_clairvoyance([9, 3, 0], 7), [4.5, 3, 4.5])
+
+
+def test_leaves_days_without_food_before_any_food():
+	np.testing.assert_array_equal(redistribute_with_clairvoyance([0, 0, 6], 7), [0, 0, 6])
+
+
+def test_span_gives_exactly_the_whole_redistribution(timeline):
+	# Redistributing only the span must give the days of the range bit for bit as redistributing everything does.
+	days = len(timeline)
+	for lookahead_window in LOOKAHEAD_WINDOWS:
+		whole = redistribute_with_clairvoyance(timeline, lookahead_window)
+		for start, end in {(0, days), (0, days // 2), (days // 3, days // 2), (days // 2, days), (days, days)}:
+			first, last = redistribution_span(timeline, lookahead_window, start, end)
+			assert 0 <= first <= start and end <= last <= days
+			part = redistribute_with_clairvoyance(timeline[first:last], lookahead_window)
+			np.testing.assert_array_equal(part[start - first:end - first], whole[start:end])
+
+
+def test_span_starts_at_the_last_full_window_of_food():
+	# Day 9 takes food from days 6 to 8, none of which is empty, so the days before them can be left out.
+	total_by_day = np.array([0, 5, 5, 5, 5, 0, 5, 5, 5, 0, 5, 5])
+	assert redistribution_span(total_by_day, 3, 9, 10) == (6, 12)
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas
+import pytest
+
+from rations.kitchens import KitchenIndex, haversine_metres
+
+
+def kitchens(count, seed=0):
+	# `count` kitchens scattered over the ghetto's few square kilometres.
+	random_numbers = np.random.default_rng(seed)
+	return pandas.DataFrame({
+		"name": [f"Kitchen {index}" for index in range(count)],
+		"address": ["Franciszkańska 13"] * count,
+		"latitude": 51.77 + random_numbers.random(count) * 0.05,
+		"longitude": 19.42 + random_numbers.random(count) * 0.08,
+	})
+
+
+@pytest.fixture(scope="module")
+def layout():
+	frame = kitchens(2000)
+	return frame, KitchenIndex(frame)
+
+
+# Points inside the layout, at its edge and well away from it.
+POINTS = ((51.79, 19.46), (51.77, 19.42), (51.8213, 19.5004), (51.75, 19.40), (52.23, 21.01))
+
+
+@pytest.mark.parametrize("latitude, longitude", POINTS)
+def test_within_box_matches_checking_every_kitchen(layout, latitude, longitude):
+	frame, index = layout
+	for half_side in (0.001, 0.01, 0.1):
+		south, west, north, east = latitude - half_side, longitude - half_side, latitude + half_side, longitude + half_side
+		inside = (frame.latitude >= south) & (frame.latitude <= north) & (frame.longitude >= west) & (frame.longitude <= east)
+		assert index.within_box(south, west, north, east).index.tolist() == np.flatnonzero(inside.to_numpy()).tolist()
+
+
+@pytest.mark.parametrize("latitude, longitude", POINTS)
+def test_within_matches_measuring_every_kitchen(layout, latitude, longitude):
+	frame, index = layout
+	distances = haversine_metres(latitude, longitude, frame.latitude.to_numpy(), frame.longitude.to_numpy())
+	for metres in (50, 300, 1500):
+		found = index.within(latitude, longitude, metres)
+		assert sorted(found.index) == np.flatnonzero(distances <= metres).tolist()
+		np.testing.assert_allclose(found.metres.to_numpy(), np.sort(distances[distances <= metres]))
+
+
+@pytest.mark.parametrize("latitude, longitude", POINTS)
+def test_nearest_matches_measuring_every_kitchen(layout, latitude, longitude):
+	frame, index = layout
+	distances = haversine_metres(latitude, longitude, frame.latitude.to_numpy(), frame.longitude.to_numpy())
+	for count in (1, 3, 10):
+		np.testing.assert_allclose(index.nearest(latitude, longitude, count).metres.to_numpy(), np.sort(distances)[:count])
+
+
+def test_fewer_kitchens_than_asked_for():
+	index = KitchenIndex(kitchens(3))
+	assert len(index.nearest(51.79, 19.46, 5)) == 3
+	empty = KitchenIndex(kitchens(0))
+	assert len(empty.nearest(51.79, 19.46, 2)) == 0 and len(empty.within(51.79, 19.46, 100)) == 0
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from rations.matrix import _overwrite, accumulate_runs
+
+
+def paint(columns, starts, ends, rates, days, width):
+	# The runs painted day by day onto a (days, width) grid in the order given, each over the ones before it, with how
+	# many runs painted each cell.
+	values = np.zeros((days, width))
+	painted = np.zeros((days, width), dtype=np.int64)
+	for column, start, end, rate in zip(columns, starts, ends, rates):
+		values[start:end, column] = rate
+		painted[start:end, column] += 1
+	return values, painted
+
+
+def runs(*runs):
+	# (column, start, end, rate) tuples as the arrays _overwrite takes.
+	columns, starts, ends, rates = zip(*runs) if runs else ((), (), (), ())
+	return np.array(columns, dtype=np.int32), np.array(starts, dtype=np.int32), np.array(ends, dtype=np.int32), np.array(rates, dtype=np.float64)
+
+
+def random_runs(days, width, count, seed=0):
+	random_numbers = np.random.default_rng(seed)
+	starts = random_numbers.integers(0, days, count)
+	ends = np.minimum(starts + random_numbers.integers(1, 30, count), days)
+	return runs(*zip(random_numbers.integers(0, width, count), starts, ends, random_numbers.choice([0.5, 1.0, 2.0, 3.5], count)))
+
+
+# Runs nested in each other, sharing a start or an end, end to end, covering the same days, reaching the last day, and
+# many at random.
+RUNS = {
+	"nested": runs((0, 0, 20, 1.0), (0, 5, 15, 2.0), (0, 8, 10, 3.0), (0, 2, 18, 0.5)),
+	"same start or end": runs((0, 3, 9, 1.0), (0, 3, 6, 2.0), (0, 5, 9, 3.0)),
+	"end to end": runs((0, 0, 5, 1.0), (0, 5, 10, 1.0), (1, 0, 5, 2.0), (1, 5, 10, 3.0)),
+	"same days": runs((0, 4, 8, 1.0), (0, 4, 8, 2.0), (1, 4, 8, 3.0)),
+	"last day": runs((0, 25, 30, 1.0), (0, 29, 30, 2.0), (1, 0, 30, 3.0)),
+	"random": random_runs(30, 4, 200),
+}
+
+
+@pytest.mark.parametrize("name", list(RUNS))
+def test_overwrite_matches_painting_day_by_day(name):
+	days, width = 30, 4
+	expected, _ = paint(*RUNS[name], days, width)
+	overwritten = _overwrite(*RUNS[name], days)
+	values, painted = paint(*overwritten, days, width)
+	# No two runs left overlap, and together they give every cell the rate of the last run over it.
+	assert painted.max(initial=0) <= 1
+	np.testing.assert_array_equal(values, expected)
+	np.testing.assert_array_equal(accumulate_runs(*overwritten, days, width), expected)
+
+
+def test_overwrite_cuts_only_where_runs_overlap():
+	# The second run splits the first; the third, of another item, cuts nothing.
+	columns, starts, ends, rates = _overwrite(*runs((0, 0, 10, 1.0), (0, 3, 5, 2.0), (1, 2, 4, 3.0)), 10)
+	assert sorted(zip(columns.tolist(), starts.tolist(), ends.tolist(), rates.tolist())) == [
+		(0, 0, 3, 1.0),
+		(0, 3, 5, 2.0),
+		(0, 5, 10, 1.0),
+		(1, 2, 4, 3.0),
+	]
+
+
+def test_overwrite_joins_the_segments_of_a_run():
+	# The last run covers the boundaries the others left in it, and comes out whole.
+	overwritten = _overwrite(*runs((0, 0, 10, 1.0), (0, 2, 4, 2.0), (0, 0, 10, 3.0)), 10)
+	assert [array.tolist() for array in overwritten] == [[0], [0], [10], [3.0]]
+
+
+def test_overwrite_without_runs():
+	assert all(len(array) == 0 for array in _overwrite(*runs(), 10))
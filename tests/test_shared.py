@@ -0,0 +1,30 @@
+import numpy as np
+
+from benchmarks.synthetic import generate_announcements, generate_caloric_values
+from rations.engine import Rations
+from rations.fake_airtable import FakeAirtable
+from rations.precompute import UNITS
+from rations.shared import ITEM_STRATEGIES, open_timelines, publish_timelines
+from rations.snapshot import SnapshotStore
+from rations.sources import CALORIC_VALUES_TABLE_NAME, RATIONS_TABLE_NAME
+
+
+def test_published_timelines_match_calculated_ones():
+	tables = {RATIONS_TABLE_NAME: generate_announcements(), CALORIC_VALUES_TABLE_NAME: generate_caloric_values()}
+	store = SnapshotStore()
+	with FakeAirtable(tables) as airtable:
+		store.sync_all(api_url=airtable.api_url)
+	rations = Rations(store.fingerprint())
+	assert open_timelines(rations.fingerprint) is None
+	keys = [(unit, strategy) for unit in UNITS for strategy in ITEM_STRATEGIES]
+	calculated = {key: (rations.items(*key), rations.timeline(*key)) for key in keys}
+
+	publish_timelines(rations.fingerprint)
+	assert open_timelines(rations.fingerprint) is not None
+	# Exactly the same, whichever way a server got them.
+	for key, (items, total) in calculated.items():
+		published_items, published_total = rations.items(*key), rations.timeline(*key)
+		assert published_items.values.dtype == items.values.dtype and published_total.dtype == total.dtype
+		np.testing.assert_array_equal(published_items.values, items.values)
+		np.testing.assert_array_equal(published_total, total)
+		np.testing.assert_array_equal(published_items.total(), items.total())
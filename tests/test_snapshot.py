@@ -0,0 +1,70 @@
+import time
+from datetime import timedelta
+
+from rations import snapshot
+from rations.fake_airtable import FakeAirtable
+from rations.snapshot import SnapshotStore
+
+
+TABLE_NAMES = ("Caloric Value",)
+
+
+def record(index, calories):
+	return {
+		"id": f"cal{index:06d}",
+		"createdTime": "2020-11-01T00:00:00.000Z",
+		"fields": {"Label": f"Item {index}", "Caloric Value (kcal/100g)": calories},
+	}
+
+
+def fields_by_id(store):
+	return {record["id"]: record["fields"] for record in store.read(TABLE_NAMES[0])}
+
+
+def fresh_fingerprint(directory, airtable):
+	store = SnapshotStore(str(directory))
+	store.sync_all(TABLE_NAMES, api_url=airtable.api_url)
+	return store.fingerprint(TABLE_NAMES)
+
+
+def test_full_incremental_and_full_again(tmp_path, monkeypatch):
+	# Without the overlap, and with the records put on the fake a second (the resolution of the last sync time) before
+	# the first sync, an incremental sync fetches exactly the records put after it.
+	monkeypatch.setattr(snapshot, "SYNC_OVERLAP", timedelta(0))
+	store = SnapshotStore(str(tmp_path / "snapshot"))
+	with FakeAirtable({TABLE_NAMES[0]: [record(index, 100 + index) for index in range(250)]}) as airtable:
+		time.sleep(1)
+		# The first sync fetches every record, over several pages.
+		assert store.sync_all(TABLE_NAMES, api_url=airtable.api_url) == {TABLE_NAMES[0]: 250}
+		assert len(fields_by_id(store)) == 250
+		synced = store.fingerprint(TABLE_NAMES)
+		assert synced == fresh_fingerprint(tmp_path / "first", airtable)
+
+		# An incremental sync picks up changed and added records, but can't see deletions.
+		airtable.put(TABLE_NAMES[0], record(3, 999))
+		airtable.put(TABLE_NAMES[0], record(250, 350))
+		airtable.delete(TABLE_NAMES[0], "cal000007")
+		assert store.sync_all(TABLE_NAMES, api_url=airtable.api_url) == {TABLE_NAMES[0]: 2}
+		fields = fields_by_id(store)
+		assert fields["cal000003"]["Caloric Value (kcal/100g)"] == 999
+		assert "cal000250" in fields and "cal000007" in fields
+		incremental = store.fingerprint(TABLE_NAMES)
+		assert incremental != synced
+
+		# A full sync drops the deleted record, leaving the snapshot as a fresh one would be.
+		assert store.sync_all(TABLE_NAMES, full=True, api_url=airtable.api_url) == {TABLE_NAMES[0]: 250}
+		fields = fields_by_id(store)
+		assert "cal000007" not in fields and len(fields) == 250
+		assert store.fingerprint(TABLE_NAMES) not in (synced, incremental)
+		assert store.fingerprint(TABLE_NAMES) == fresh_fingerprint(tmp_path / "second", airtable)
+
+
+def test_fingerprint_ignores_a_sync_without_changes(tmp_path):
+	store = SnapshotStore(str(tmp_path))
+	with FakeAirtable({TABLE_NAMES[0]: [record(index, 100) for index in range(10)]}) as airtable:
+		store.sync_all(TABLE_NAMES, api_url=airtable.api_url)
+		synced = store.fingerprint(TABLE_NAMES)
+		store.sync_all(TABLE_NAMES, api_url=airtable.api_url)
+		assert store.fingerprint(TABLE_NAMES) == synced
+		store.sync_all(TABLE_NAMES, full=True, api_url=airtable.api_url)
+		assert store.fingerprint(TABLE_NAMES) == synced
@@ -0,0 +1,58 @@
+from datetime import date
+
+import numpy as np
+
+from rations.axes import DateAxis
+from rations.streaks import GapIndex, Streaks
+
+
+CALENDAR = DateAxis(date(1940, 3, 13), 200)
+
+
+def stretches_by_scanning(total_by_day):
+	# Every (first day, end day) stretch of zeros, found one day at a time.
+	stretches = []
+	for day, total in enumerate(total_by_day):
+		if total != 0:
+			continue
+		if stretches and stretches[-1][1] == day:
+			stretches[-1][1] = day + 1
+		else:
+			stretches.append([day, day + 1])
+	return [tuple(stretch) for stretch in stretches]
+
+
+def test_streaks_match_scanning(timeline):
+	streaks = Streaks.without_food(timeline, DateAxis(CALENDAR.origin, len(timeline)))
+	assert list(zip(streaks.starts.tolist(), streaks.ends.tolist())) == stretches_by_scanning(timeline)
+
+
+def test_between_matches_filtering_every_gap(timeline):
+	calendar = DateAxis(CALENDAR.origin, len(timeline))
+	gaps = GapIndex.without_food(timeline, {}, calendar)
+	days = len(timeline)
+	# Whole, open-ended, narrowed, reaching past the calendar, and a single day.
+	ranges = ((None, None), (None, days // 2), (days // 3, None), (days // 4, days // 2), (-5, days + 5), (days // 2, days // 2))
+	for first, last in ranges:
+		for longer_than in (0, 1, 3):
+			expected = [
+				position
+				for position, (start, end) in enumerate(zip(gaps.starts.tolist(), gaps.ends.tolist()))
+				if (first is None or end > first) and (last is None or start <= last) and end - start > longer_than
+			]
+			first_date = None if first is None else calendar.date(first)
+			last_date = None if last is None else calendar.date_string(last)
+			assert gaps.between(first_date, last_date, longer_than).tolist() == expected
+
+
+def test_preceding_announcement():
+	# The last announcement to take effect before a gap began, not on its first day.
+	total_by_day = np.ones(len(CALENDAR))
+	total_by_day[[2, 3, 10, 50]] = 0
+	announcements = {
+		"first": {"start_date": CALENDAR.date(4)},
+		"second": {"start_date": CALENDAR.date(10)},
+		"third": {"start_date": CALENDAR.date(20)},
+	}
+	gaps = GapIndex.without_food(total_by_day, announcements, CALENDAR)
+	assert gaps.preceding == (None, "first", "third")
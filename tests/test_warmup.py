@@ -0,0 +1,23 @@
+from rations import warmup
+from rations.fake_airtable import FakeAirtable
+from rations.snapshot import SnapshotStore
+from rations.sources import CALORIC_VALUES_TABLE_NAME, RATIONS_TABLE_NAME
+
+
+def test_ready_only_for_the_same_snapshot_and_code(tmp_path, monkeypatch):
+	store = SnapshotStore(str(tmp_path / "snapshot"))
+	record = {"id": "rec1", "createdTime": "2020-11-01T00:00:00.000Z", "fields": {"Label": "Item"}}
+	path = str(tmp_path / "ready.json")
+	with FakeAirtable({RATIONS_TABLE_NAME: [], CALORIC_VALUES_TABLE_NAME: [record]}) as airtable:
+		store.sync_all(api_url=airtable.api_url)
+		assert not warmup.is_ready(path, store)
+		warmup.mark_ready(store.fingerprint(), 1.0, path)
+		assert warmup.is_ready(path, store)
+
+		monkeypatch.setattr(warmup, "_package_digest", lambda: "edited")
+		assert not warmup.is_ready(path, store)
+		monkeypatch.undo()
+
+		airtable.put(CALORIC_VALUES_TABLE_NAME, dict(record, fields={"Label": "Other item"}))
+		store.sync_all(api_url=airtable.api_url)
+		assert not warmup.is_ready(path, store)